@@ -1,20 +1,84 @@
-from flask import Flask, render_template, request
+import os
+import threading
+
+from flask import Flask, Response, abort, jsonify, redirect, render_template, request, url_for
 
 from src.main import main
+from src.services import telemetry
+from src.services.plan_cache import PlanCache, paginate
+from src.services.solver_worker import SolverWorker
 
 api = Flask(__name__)
+solver_worker = None
+solver_worker_lock = threading.Lock()
+plan_cache = PlanCache()
+
+
+def get_solver_worker():
+    """
+    The solvers process, pre-warmed while the form is displayed. Started on the first request, so that it only
+    runs in the process serving the requests (not in the reloader watching the files), whatever the server.
+    SAMU_SOLVER_WORKER=1 enables it
+
+    Returns:
+        SolverWorker: None if not enabled
+    """
+    global solver_worker
+    if not os.environ.get('SAMU_SOLVER_WORKER'):
+        return None
+    with solver_worker_lock:
+        if solver_worker is None:
+            solver_worker = SolverWorker().start()
+    return solver_worker
 
 
 @api.route('/', methods=['GET', 'POST'])
 def display_planning():
-    planning = ''
+    worker = get_solver_worker()
     if request.method == 'POST':
         if request.form['submit_button'] == 'Do Plan':
-            planning = main()
+            workers = worker.plan() if worker else main()
+            planning = [worker.as_dict() for worker in workers]
             for x in planning:
                 x['names'] = x['name'].replace('_', ' ')
+            # The plan is browsed with GET requests, so that its pages can be cached
+            return redirect(url_for('display_plan', plan_id=plan_cache.add(planning)))
+
+    return render_template('planning.html', data='')
+
+
+@api.route('/plans/<plan_id>', methods=['GET'])
+def display_plan(plan_id):
+    """One page of a plan, optionally filtered with `?sector=1&date=2019-02-12&page=2`"""
+    planning = plan_cache.get(plan_id)
+    if planning is None:
+        abort(404)
+
+    sector = request.args.get('sector', type=int)
+    date = request.args.get('date') or None
+    page = request.args.get('page', 1, type=int)
+    html, compressed, etag = plan_cache.rendered(
+        (plan_id, sector, date, page),
+        lambda: render_template('planning.html', plan_id=plan_id, **paginate(planning, sector, date, page)))
+
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = Response(compressed, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    # A plan never changes, but the browsers check that it is still kept before using their copy
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 
-    return render_template('planning.html', data=planning)
+@api.route('/telemetry', methods=['GET'])
+def display_telemetry():
+    """Telemetry of the last solver searches, optionally filtered with `?search=routing`"""
+    return jsonify(telemetry.records(request.args.get('search')))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,178 @@
+"""
+Run the planning pipeline on many scenarios in parallel, without the web interface.
+
+Scenarios are either the sub-directories of a directory, each containing a `hotels.csv`,
+an `employees.csv` and optionally a `parameters.json` with the keyword arguments of `main`,
+or the entries of a json manifest:
+    ```
+    [{"name": "february", "hotels": "february/hotels.csv", "employees": "february/employees.csv",
+      "parameters": {"per_sector": true}}]
+    ```
+Each scenario writes its json result and its log in the output directory, and a `summary.json`
+reports the status and timing of each of them. The roster index and the last visits of each
+scenario are also kept in the output directory, so that the scenarios do not share them.
+    ```
+    $ python src/batch.py -s scenarios/ -o results/ -p 4
+    ```
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from multiprocessing import Process, cpu_count
+
+HOTELS_FILE_NAME = 'hotels.csv'
+EMPLOYEES_FILE_NAME = 'employees.csv'
+PARAMETERS_FILE_NAME = 'parameters.json'
+SUMMARY_FILE_NAME = 'summary.json'
+ROSTER_INDEX_FILE_NAME = '{}-roster-index.json'
+LAST_VISITS_FILE_NAME = '{}-last-visits.json'
+
+
+def read_scenarios(source):
+    """
+    Args:
+        source (str): directory of scenarios, or json manifest
+
+    Returns:
+        scenarios (list[dict]): each with its `name`, `hotels` and `employees` files and `parameters`
+    """
+    scenarios = _read_scenarios(source)
+    names = [scenario['name'] for scenario in scenarios]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError('Duplicate scenario names: {}'.format(', '.join(duplicates)))
+    return scenarios
+
+
+def _read_scenarios(source):
+    if os.path.isdir(source):
+        scenarios = []
+        for name in sorted(os.listdir(source)):
+            directory = os.path.join(source, name)
+            if not os.path.isfile(os.path.join(directory, HOTELS_FILE_NAME)):
+                continue
+            parameters_file = os.path.join(directory, PARAMETERS_FILE_NAME)
+            parameters = {}
+            if os.path.isfile(parameters_file):
+                with open(parameters_file, 'r', encoding='utf-8') as f:
+                    parameters = json.load(f)
+            scenarios.append({
+                'name': name,
+                'hotels': os.path.join(directory, HOTELS_FILE_NAME),
+                'employees': os.path.join(directory, EMPLOYEES_FILE_NAME),
+                'parameters': parameters,
+            })
+        return scenarios
+
+    with open(source, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    root = os.path.dirname(os.path.abspath(source))
+    return [{
+        'name': scenario.get('name') or 'scenario-{}'.format(i),
+        'hotels': os.path.join(root, scenario['hotels']),
+        'employees': os.path.join(root, scenario['employees']),
+        'parameters': scenario.get('parameters', {}),
+    } for i, scenario in enumerate(manifest)]
+
+
+def run_scenarios(scenarios, output_directory, processes=None):
+    """
+    Run each scenario in its own process, at most `processes` at once.
+
+    Scenarios run in non-daemonic processes so that the parallel solvers
+    (e.g. `per_sector`, `portfolio`) can start their own pools.
+
+    Args:
+        scenarios (list[dict]): as returned by `read_scenarios`
+        output_directory (str):
+        processes (int): defaults to the number of CPUs
+
+    Returns:
+        summary (dict)
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    processes = processes or cpu_count()
+
+    # The outputs of a previous run would be reported for the scenarios crashing in this one
+    for scenario in scenarios:
+        for extension in ['json', 'log']:
+            path = os.path.join(output_directory, '{}.{}'.format(scenario['name'], extension))
+            if os.path.exists(path):
+                os.remove(path)
+
+    start = time.time()
+    pending, running = list(scenarios), []
+    while pending or running:
+        while pending and len(running) < processes:
+            process = Process(target=run_scenario, args=(pending.pop(0), output_directory))
+            process.start()
+            running.append(process)
+        running[0].join(0.1)
+        running = [p for p in running if p.is_alive()]
+    wall_time = time.time() - start
+
+    results = []
+    for scenario in scenarios:
+        result_file = os.path.join(output_directory, '{}.json'.format(scenario['name']))
+        if os.path.isfile(result_file):
+            with open(result_file, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        else:
+            result = {'status': 'crashed', 'seconds': None}
+        results.append({'name': scenario['name'], 'status': result['status'], 'seconds': result['seconds']})
+
+    summary = {
+        'scenarios': results,
+        'wall_time_seconds': wall_time,
+        'sequential_time_seconds': sum(r['seconds'] or 0 for r in results),
+    }
+    with open(os.path.join(output_directory, SUMMARY_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def run_scenario(scenario, output_directory):
+    # Imported in the scenario process only, to keep the parent light
+    from src.main import main
+
+    result = {'name': scenario['name'], 'parameters': scenario['parameters']}
+    parameters = dict({
+        'roster_index_file': os.path.join(output_directory, ROSTER_INDEX_FILE_NAME.format(scenario['name'])),
+        'last_visits_file': os.path.join(output_directory, LAST_VISITS_FILE_NAME.format(scenario['name'])),
+    }, **scenario['parameters'])
+    start = time.time()
+    with open(os.path.join(output_directory, '{}.log'.format(scenario['name'])), 'w', encoding='utf-8') as log:
+        with redirect_stdout(log):
+            try:
+                workers = main(hotels_file=scenario['hotels'], employees_file=scenario['employees'], **parameters)
+                result['status'] = 'success'
+                result['workers'] = [worker.as_dict() for worker in workers]
+            except Exception:
+                traceback.print_exc(file=log)
+                result['status'] = 'failed'
+                result['error'] = traceback.format_exc()
+    result['seconds'] = time.time() - start
+
+    with open(os.path.join(output_directory, '{}.json'.format(scenario['name'])), 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the planning on many scenarios in parallel')
+    parser.add_argument('-s', '--scenarios', help='directory of scenarios or json manifest', type=str, required=True)
+    parser.add_argument('-o', '--output', help='directory where to write the results', type=str, required=True)
+    parser.add_argument('-p', '--processes', help='number of scenarios run at once', type=int, default=None)
+
+    args = parser.parse_args()
+
+    summary = run_scenarios(read_scenarios(args.scenarios), args.output, args.processes)
+
+    for scenario in summary['scenarios']:
+        print('{}: {} in {}s'.format(scenario['name'], scenario['status'], scenario['seconds']))
+    print('Total: {:.2f}s, {:.2f}s if run sequentially'.format(summary['wall_time_seconds'],
+                                                             summary['sequential_time_seconds']))
+    sys.exit(0 if all(s['status'] == 'success' for s in summary['scenarios']) else 1)
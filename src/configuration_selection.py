@@ -0,0 +1,117 @@
+"""
+Pick the couple configuration leading to the shortest routes.
+
+`satisfaction` returns many equally good pairings of the employees, but they can lead to very
+different travel distances. The top-K configurations are routed in parallel, the most promising
+first, and a configuration is pruned without being routed when a cheap lower bound of its
+routes cost is already above the best cost found.
+"""
+import time
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from src.domain.couples import format_couples_with_positions
+from src.domain.distances import distances_block
+from src.domain.solver import HOTELS_PER_ROUTE, create_data_model, create_search_parameters, solve_data_model
+from src.services import telemetry
+
+TOP_K_CONFIGURATIONS = 5
+
+
+def routes_lower_bound(hotels, workers):
+    """
+    Lower bound of the routes cost: each couple used goes back and forth from its depot at least to
+    its nearest hotel, and at least enough couples to visit all the hotels are used. The distances are
+    not symmetric, both ways are taken as the routing distance matrix has them.
+
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+
+    Returns:
+        int: lower bound of the total distance, in meters
+    """
+    hotels_points = np.array([(h.point.latitude, h.point.longitude) for h in hotels if h.point]).reshape(-1, 2)
+    workers_points = np.array([(w.point.latitude, w.point.longitude) for w in workers if w.point]).reshape(-1, 2)
+    if not len(hotels_points) or not len(workers_points):
+        return 0
+
+    round_trips = (distances_block(workers_points, hotels_points).astype(np.int64)
+                   + distances_block(hotels_points, workers_points).T)
+    round_trips = np.sort(round_trips.min(axis=1))
+    used_workers = min(-(-len(hotels_points) // HOTELS_PER_ROUTE), len(round_trips))
+    return int(round_trips[:used_workers].sum())
+
+
+def select_best_configuration(hotels, employees, assignments, top_k=TOP_K_CONFIGURATIONS, processes=None,
+                              time_limit=None, **routing_options):
+    """
+    Args:
+        hotels (list[Hotel]):
+        employees (list[Employee]):
+        assignments (list[dict[tuple(str,str): list[int]]]]): configurations returned by `solve_couples`
+        top_k (int): number of configurations considered
+        processes (int): number of worker processes, defaults to the number of CPUs
+        time_limit (float): seconds given to the routing of all the configurations, shared by the waves
+            of configurations routed in parallel
+        routing_options: see `create_data_model`, e.g. `drop_penalty`, `aggregation_radius`, `neighbours`
+
+    Returns:
+        dict: the best `assignment`, its `workers`, `itinerary` and `cost`, with the number of
+            configurations `evaluated` and `pruned`, and an estimation of the time saved by pruning.
+            None if none of the configurations can be routed
+    """
+    candidates = assignments[:top_k]
+    workers_per_candidate = [format_couples_with_positions(employees, a) for a in candidates]
+    lower_bounds = [routes_lower_bound(hotels, workers) for workers in workers_per_candidate]
+    pending = sorted(range(len(candidates)), key=lambda i: lower_bounds[i])
+    processes = max(min(processes or cpu_count(), len(candidates)), 1)
+    time_limit_ms = None
+    if time_limit:
+        waves = max(-(-len(candidates) // processes), 1)
+        time_limit_ms = max(int(time_limit * 1000 / waves), 1)
+
+    best, best_cost = None, None
+    evaluated, pruned, elapsed_times = 0, 0, []
+    with Pool(processes) as pool:
+        while pending:
+            wave = []
+            while pending and len(wave) < processes:
+                i = pending.pop(0)
+                if best_cost is not None and lower_bounds[i] >= best_cost:
+                    pruned += 1
+                    continue
+                wave.append(i)
+            results = telemetry.merged(pool.starmap(telemetry.collected, [
+                (_evaluate_configuration, hotels, workers_per_candidate[i], time_limit_ms, routing_options)
+                for i in wave]))
+            for i, (itinerary, cost, elapsed) in zip(wave, results):
+                evaluated += 1
+                elapsed_times.append(elapsed)
+                print('Configuration {}: lower bound {}, cost {}, in {:.2f}s'.format(i, lower_bounds[i], cost, elapsed))
+                if itinerary is not None and (best_cost is None or cost < best_cost):
+                    best, best_cost = i, cost
+                    best_itinerary = itinerary
+
+    pruning_saved_seconds = pruned * float(np.mean(elapsed_times)) if elapsed_times else 0.
+    print('{} configurations evaluated, {} pruned, saving about {:.2f}s'.format(evaluated, pruned,
+                                                                                 pruning_saved_seconds))
+    if best is None:
+        return None
+    return {
+        'assignment': candidates[best],
+        'workers': workers_per_candidate[best],
+        'itinerary': best_itinerary,
+        'cost': best_cost,
+        'evaluated': evaluated,
+        'pruned': pruned,
+        'pruning_saved_seconds': pruning_saved_seconds,
+    }
+
+
+def _evaluate_configuration(hotels, workers, time_limit_ms, routing_options):
+    start = time.time()
+    data = create_data_model(hotels, workers, False, **routing_options)
+    itinerary, cost = solve_data_model(data, create_search_parameters(time_limit_ms=time_limit_ms))
+    return itinerary, cost, time.time() - start
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from src.domain.utils import availability_slot
 from src.services.csv_reader import parse_csv
 
 
@@ -8,31 +9,52 @@ def read_employees_file(filepath):
 
     grouped_employees = {}
     for employee in employees:
-        name_and_surname = '{} {}'.format(employee['name'].strip(), employee['surname'].strip())
-        new_availability = process_employee_availability(employee)
-        if name_and_surname not in grouped_employees:
-            grouped_employees[name_and_surname] = employee
-            grouped_employees[name_and_surname]['availabilities'] = new_availability
-        else:
-            new_availability = process_employee_availability(employee)
-            grouped_employees[name_and_surname]['availabilities'] += new_availability
+        merge_employee(grouped_employees, employee)
 
     return grouped_employees.values()
 
 
 def process_employee_availability(employee):
-    availability = datetime.strptime(employee['availability'], '%d/%m/%Y')
-    time_of_day = employee['time_of_day']
-    if time_of_day.strip().lower() == 'jour':
-        morning, afternoon = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0), \
-                             '{}{}{}{}'.format(availability.year, availability.month, availability.day, 1)
-        return [int(morning), int(afternoon)]
-    elif time_of_day.strip().lower() == 'matin':
-        morning = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0)
-        return [int(morning)]
+    availability = datetime.strptime(employee['availability'], '%d/%m/%Y').date()
+    time_of_day = employee['time_of_day'].strip().lower()
+    if time_of_day == 'jour':
+        return [availability_slot(availability, 0), availability_slot(availability, 1)]
+    elif time_of_day == 'matin':
+        return [availability_slot(availability, 0)]
     else:
-        afternoon = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0)
-        return [int(afternoon)]
+        return [availability_slot(availability, 1)]
+
+
+def normalize_name(name, surname):
+    """
+    Key identifying an employee in the roster, whatever the case and spacing of the rows
+
+    Args:
+        name (str):
+        surname (str):
+
+    Returns:
+        str
+    """
+    return '{} {}'.format(' '.join(name.split()), ' '.join(surname.split())).lower()
+
+
+def merge_employee(roster, employee):
+    """
+    Add the availabilities of an employee row to the roster. Every ingestion of the employee file
+    (whole, incremental or raw) groups the rows with it, so that they all build the same roster
+
+    Args:
+        roster (dict[str: Employee]): employees by `normalize_name`, updated in place
+        employee (Employee): a row of the employee file
+    """
+    key = normalize_name(employee['name'], employee['surname'])
+    new_availability = process_employee_availability(employee)
+    if key not in roster:
+        roster[key] = employee
+        roster[key]['availabilities'] = []
+    availabilities = roster[key]['availabilities']
+    availabilities += [a for a in new_availability if a not in availabilities]
 
 
 if __name__ == '__main__':
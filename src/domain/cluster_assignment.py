@@ -0,0 +1,133 @@
+"""
+Split the routing problem in one small problem per couple of workers.
+
+The hotels are grouped in clusters of at most HOTELS_PER_ROUTE nearby hotels, then each cluster
+is assigned to one couple by a min-cost assignment on the distance between the couple's depot
+and the cluster's centroid (the linear sum assignment of the legacy models). Each couple then
+only has to solve a single vehicle TSP over its own cluster, and these are solved in parallel
+instead of one large multi-vehicle routing problem.
+"""
+from multiprocessing import Pool
+
+import numpy as np
+from ortools.graph import pywrapgraph
+
+from src.domain.distances import distances_block
+from src.domain.solver import HOTELS_PER_ROUTE, format_label, solve_routes
+from src.services import telemetry
+
+KMEANS_ITERATIONS = 10
+
+
+def cluster_hotels(hotels, clusters_count, capacity=HOTELS_PER_ROUTE, iterations=KMEANS_ITERATIONS):
+    """
+    Group the hotels in clusters of nearby hotels, of at most `capacity` hotels each.
+
+    Args:
+        hotels (list[Hotel]): hotels with a point
+        clusters_count (int):
+        capacity (int): maximum number of hotels in a cluster
+        iterations (int): number of iterations of the k-means
+
+    Returns:
+        clusters (list[list[Hotel]]): `clusters_count` clusters, some possibly empty
+        centroids (np.array): (latitude, longitude) of each cluster, shape (clusters_count, 2)
+        unassigned (list[Hotel]): hotels that did not fit in the clusters
+    """
+    points = np.array([(h.point.latitude, h.point.longitude) for h in hotels], dtype=np.float64).reshape(-1, 2)
+    k = min(clusters_count, len(points))
+    centroids = np.zeros((clusters_count, 2))
+    if not k:
+        return [[] for _ in range(clusters_count)], centroids, list(hotels)
+
+    # Farthest-first initialisation, starting from the hotel closest to the barycenter
+    seeds = [int(np.argmin(distances_block(points.mean(axis=0, keepdims=True), points)[0]))]
+    for _ in range(1, k):
+        seeds.append(int(np.argmax(distances_block(points[seeds], points).min(axis=0))))
+    centroids[:k] = points[seeds]
+
+    for _ in range(iterations):
+        labels = np.argmin(distances_block(points, centroids[:k]), axis=1)
+        for c in range(k):
+            if (labels == c).any():
+                centroids[c] = points[labels == c].mean(axis=0)
+
+    # Hotels closest to a centroid choose first, and go to the next closest cluster when it is full
+    distances = distances_block(points, centroids[:k])
+    clusters = [[] for _ in range(clusters_count)]
+    unassigned = []
+    for i in np.argsort(distances.min(axis=1), kind='stable'):
+        for c in np.argsort(distances[i], kind='stable'):
+            if len(clusters[c]) < capacity:
+                clusters[c].append(hotels[i])
+                break
+        else:
+            unassigned.append(hotels[i])
+
+    return clusters, centroids, unassigned
+
+
+def assign_clusters(workers, centroids):
+    """
+    Min-cost assignment of one cluster to each couple of workers, based on the distance
+    between their depot and the centroid of the cluster.
+
+    Args:
+        workers (list[Worker]):
+        centroids (np.array): (latitude, longitude) of each cluster, at least one per worker.
+            The clusters left over are not assigned
+
+    Returns:
+        dict[int: int]: cluster assigned to each worker, by index
+    """
+    if len(centroids) < len(workers):
+        raise ValueError('{} clusters cannot be assigned to {} workers'.format(len(centroids), len(workers)))
+
+    depots = np.array([(w.point.latitude, w.point.longitude) for w in workers], dtype=np.float64).reshape(-1, 2)
+    costs = distances_block(depots, centroids)
+
+    # The assignment must be balanced: the clusters left over go to fictitious workers, at no cost
+    assignment = pywrapgraph.LinearSumAssignment()
+    for i in range(len(centroids)):
+        for j in range(len(centroids)):
+            assignment.AddArcWithCost(i, j, int(costs[i, j]) if i < len(workers) else 0)
+
+    solve_status = assignment.Solve()
+    if solve_status != assignment.OPTIMAL:
+        raise ValueError('Cannot assign the clusters to the workers, status {}'.format(solve_status))
+
+    print('Clusters assigned, total distance to the clusters = {}'.format(assignment.OptimalCost()))
+    return {i: assignment.RightMate(i) for i in range(len(workers))}
+
+
+def solve_routes_by_cluster(hotels, workers, processes=None, time_limit=None, **routing_options):
+    """
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+        processes (int): number of worker processes, defaults to the number of CPUs
+        time_limit (float): seconds given to the search of each cluster, the clusters being searched in parallel
+        routing_options: see `solve_routes`, e.g. `drop_penalty`, `aggregation_radius`, `neighbours`
+
+    Returns:
+        itinerary (list[list[str]]): the route of each worker, in the same order as `workers`
+        unassigned (list[Hotel]): hotels that did not fit in the clusters of the couples, not visited
+    """
+    hotels = [h for h in hotels if h.point]
+    clusters, centroids, unassigned = cluster_hotels(hotels, len(workers))
+
+    cluster_per_worker = assign_clusters(workers, centroids)
+    routing_options = dict(routing_options, time_limit=time_limit)
+    problems = [(_solve_cluster_route, clusters[cluster_per_worker[i]], worker, routing_options)
+                for i, worker in enumerate(workers)]
+    with Pool(processes) as pool:
+        itinerary = telemetry.merged(pool.starmap(telemetry.collected, problems))
+    return itinerary, unassigned
+
+
+def _solve_cluster_route(hotels, worker, routing_options):
+    itinerary = solve_routes(hotels, [worker], **routing_options) if hotels else None
+    if itinerary is None:
+        # The worker stays at its depot
+        return [format_label(worker), format_label(worker)]
+    return itinerary[0]
@@ -0,0 +1,30 @@
+"""
+Couples of employees formed by the couple model, as workers of the routing problem.
+"""
+from src.domain.entities import Point, Worker
+from src.domain.sectors import SECTOR_COORDINATES
+
+
+def format_couples_with_positions(employees, assignements):
+    """
+    Args:
+        employees (list[Employee]):
+        assignements (dict[tuple(str,str): tuple(list[int], int)]): availabilities and sector of each couple,
+            as returned by `solve_couples`
+
+    Returns:
+        workers (list[Worker]): the couples, starting from the depot of their sector
+    """
+    workers = []
+    address_per_person = {p.name: p.address for p in employees}
+    postcode_per_person = {p.name: p.postcode for p in employees}
+
+    for couple, (availability, sector) in assignements.items():
+        p1, p2 = couple
+        workers.append(Worker(name="{}_and_{}".format(p1, p2),
+                              address=address_per_person[p1],
+                              postcode=postcode_per_person[p1],
+                              point=Point.from_record(SECTOR_COORDINATES[sector]),
+                              sector=sector,
+                              availabilities=availability))
+    return workers
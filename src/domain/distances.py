@@ -0,0 +1,127 @@
+"""
+Compact distance matrices for the routing problems.
+
+Distances are stored as int32 meters in a numpy array, computed by blocks of rows.
+Above MMAP_NODES_THRESHOLD nodes, the matrix is written to disk and memory-mapped read-only,
+so its size is only bounded by the disk and the pages actually used by the solver stay in RAM.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+EARTH_RADIUS = 6371  # km, same as Map.radius
+MMAP_NODES_THRESHOLD = 5000  # Above this number of nodes (100MB of int32), the matrix is disk-backed
+BLOCK_SIZE = 256  # Number of rows computed at once
+
+
+def distances_block(points_from, points_to):
+    """
+    Distances in meters between each point of `points_from` and each point of `points_to`.
+    Uses the same formula as Map.distance, vectorized.
+
+    Args:
+        points_from (np.array): array of shape (n, 2) of (latitude, longitude)
+        points_to (np.array): array of shape (m, 2) of (latitude, longitude)
+
+    Returns:
+        np.array: int32 array of shape (n, m)
+    """
+    departure_latitude, departure_longitude = points_from[:, 0:1], points_from[:, 1:2]
+    arrival_latitude, arrival_longitude = points_to[:, 0], points_to[:, 1]
+    latitude_distance = np.radians(arrival_latitude - departure_latitude)
+    longitude_distance = np.radians(arrival_longitude - departure_longitude)
+    a = (np.sin(latitude_distance / 2) ** 2 +
+         np.cos(np.radians(arrival_longitude)) * np.cos(np.radians(arrival_latitude)) *
+         np.sin(longitude_distance / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return np.round(EARTH_RADIUS * c * 1000).astype(np.int32)  # Distance expressed in meters
+
+
+def build_distances_matrix(points, path=None, mmap_threshold=MMAP_NODES_THRESHOLD, block_size=BLOCK_SIZE,
+                           known_distances=None):
+    """
+    Args:
+        points (list[Point]):
+        path (str): file where to store the matrix. If not given, a temporary file is used
+            when the number of points reaches `mmap_threshold`, otherwise the matrix stays in memory
+        mmap_threshold (int):
+        block_size (int): number of rows computed at once
+        known_distances (np.array): matrix of the distances between the last points, already computed
+            (e.g. between the hotels), copied instead of computed again
+
+    Returns:
+        np.array: int32 matrix of the distances in meters, read-only if memory-mapped
+    """
+    coordinates = np.array([(p.latitude, p.longitude) for p in points], dtype=np.float64).reshape(-1, 2)
+    size = len(coordinates)
+
+    temporary = path is None and size >= mmap_threshold
+    if temporary:
+        fd, path = tempfile.mkstemp(prefix='distances-', suffix='.npy')
+        os.close(fd)
+
+    if path is None:
+        matrix = np.empty((size, size), dtype=np.int32)
+    else:
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.int32, shape=(size, size))
+
+    head = size - (len(known_distances) if known_distances is not None else 0)
+    for start in range(0, head, block_size):
+        stop = min(start + block_size, head)
+        matrix[start:stop] = distances_block(coordinates[start:stop], coordinates)
+    for start in range(head, size, block_size):
+        stop = min(start + block_size, size)
+        matrix[start:stop, :head] = distances_block(coordinates[start:stop], coordinates[:head])
+        matrix[start:stop, head:] = known_distances[start - head:stop - head]
+
+    if path is None:
+        return matrix
+
+    matrix.flush()
+    del matrix
+    matrix = load_distances_matrix(path)
+    if temporary:
+        # The mapping stays valid once the file is unlinked, and the disk space is freed with it
+        os.remove(path)
+    return matrix
+
+
+def load_distances_matrix(path):
+    """
+    Args:
+        path (str): file written by `build_distances_matrix`
+
+    Returns:
+        np.memmap: read-only memory-mapped matrix, shared between the processes mapping the same file
+    """
+    return np.load(path, mmap_mode='r')
+
+
+def nearest_neighbours(distances, k, first_candidate=0, block_size=BLOCK_SIZE):
+    """
+    The k closest nodes of each node, among the nodes from `first_candidate` (e.g. the hotels only).
+
+    Args:
+        distances (np.array): square matrix of distances, possibly memory-mapped
+        k (int): number of neighbours, bounded by the number of candidates
+        first_candidate (int): index of the first node that can be a neighbour
+        block_size (int): number of rows read at once
+
+    Returns:
+        np.array: int32 array of shape (n, k) of the neighbours of each node, in no particular order
+    """
+    size = len(distances)
+    k = max(min(k, size - first_candidate - 1), 0)
+    neighbours = np.empty((size, k), dtype=np.int32)
+    if not k:
+        return neighbours
+
+    for start in range(0, size, block_size):
+        block = np.array(distances[start:start + block_size, first_candidate:], dtype=np.int64)
+        # A node is not its own neighbour
+        for row in range(len(block)):
+            if start + row >= first_candidate:
+                block[row, start + row - first_candidate] = np.iinfo(np.int64).max
+        neighbours[start:start + block_size] = np.argpartition(block, k - 1, axis=1)[:, :k] + first_candidate
+    return neighbours
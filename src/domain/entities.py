@@ -0,0 +1,114 @@
+"""
+Entities flowing through the planning pipeline.
+
+The records are slotted: no per-instance `__dict__` is allocated, which keeps the memory
+footprint and the attribute access time low on large exports. They keep a dict-like
+interface (`entity['name']`, `entity.get('point')`) so they can be used wherever the csv
+records were used, and `as_dict` gives a plain dict view for the templates.
+"""
+
+
+class Entity(object):
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.pop(field, None))
+        if fields:
+            raise TypeError('Unknown fields for {}: {}'.format(type(self).__name__, ', '.join(fields)))
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Args:
+            record (dict): a record as returned by the `CsvReader`, extra keys are ignored
+
+        Returns:
+            Entity
+        """
+        if record is None or isinstance(record, cls):
+            return record
+        return cls(**{field: record.get(field) for field in cls.__slots__})
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def replace(self, **fields):
+        """Copy of the entity, with the given fields replaced"""
+        values = {field: getattr(self, field) for field in self.__slots__}
+        values.update(fields)
+        return type(self)(**values)
+
+    def as_dict(self):
+        """Plain dict view of the entity (nested entities included), for the templates and json dumps"""
+        return {field: _as_dict(getattr(self, field)) for field in self.__slots__}
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__,
+                               ', '.join('{}={!r}'.format(f, getattr(self, f)) for f in self.__slots__))
+
+
+class Point(Entity):
+    __slots__ = ('latitude', 'longitude')
+
+
+class Employee(Entity):
+    __slots__ = ('name', 'surname', 'address', 'postcode', 'point', 'license',
+                 'availability', 'time_of_day', 'area1', 'area2', 'area3', 'area4',
+                 'availabilities', 'sector')
+
+    @classmethod
+    def from_record(cls, record):
+        employee = super(Employee, cls).from_record(record)
+        employee.point = Point.from_record(employee.point)
+        return employee
+
+
+class Hotel(Entity):
+    __slots__ = ('nom', 'address', 'postcode', 'point', 'hotel_status',
+                 'capacity', 'bedroom_number', 'features')
+
+    @classmethod
+    def from_record(cls, record):
+        hotel = super(Hotel, cls).from_record(record)
+        hotel.point = Point.from_record(hotel.point)
+        return hotel
+
+
+class HotelGroup(Entity):
+    """Hotels at the same place, visited as a single routing node. Located at its first hotel"""
+    __slots__ = ('address', 'postcode', 'point', 'hotels')
+
+    @classmethod
+    def from_hotels(cls, hotels):
+        return cls(address=hotels[0].address, postcode=hotels[0].postcode, point=hotels[0].point, hotels=hotels)
+
+
+class Worker(Entity):
+    """A couple of employees visiting hotels together"""
+    __slots__ = ('name', 'address', 'postcode', 'point', 'sector',
+                 'availabilities', 'visits', 'routes')
+
+
+def _as_dict(value):
+    if isinstance(value, Entity):
+        return value.as_dict()
+    return value
@@ -0,0 +1,86 @@
+"""
+Select the hotels to visit before routing.
+
+When there are far more hotels than the couples can visit, feeding all of them to the routing
+solver makes the problem huge, and infeasible as every hotel must be visited. The hotels are
+ranked by priority (capacity, number of bedrooms, features and time since the last visit), and
+only the top ones each sector's couples can visit are routed.
+"""
+from datetime import date
+
+from src.domain.sectors import sector_from_postcode
+from src.domain.solver import HOTELS_PER_ROUTE, format_label
+
+NEVER_VISITED_DAYS = 365  # Days since the last visit of a hotel never visited
+PRIORITY_WEIGHTS = {
+    'capacity': 1.,
+    'bedroom_number': 1.,
+    'features': 1.,
+    'days_since_last_visit': 2.,
+}
+
+
+def rank_hotels(hotels, last_visits=None, today=None):
+    """
+    Args:
+        hotels (list[Hotel]):
+        last_visits (dict[str: date]): date of the last visit of the hotels, by label
+        today (date):
+
+    Returns:
+        list[tuple(float, Hotel)]: the hotels with their priority, highest priority first
+    """
+    last_visits = last_visits or {}
+    today = today or date.today()
+
+    criteria = []
+    for hotel in hotels:
+        last_visit = last_visits.get(format_label(hotel))
+        criteria.append({
+            'capacity': _to_float(hotel.capacity),
+            'bedroom_number': _to_float(hotel.bedroom_number),
+            'features': _to_float(hotel.features),
+            'days_since_last_visit': (today - last_visit).days if last_visit else NEVER_VISITED_DAYS,
+        })
+
+    # Each criterion is scaled to [0, 1] over the catalogue before being weighted
+    maximums = {name: max([c[name] for c in criteria] + [0]) or 1. for name in PRIORITY_WEIGHTS}
+    priorities = [sum(weight * c[name] / maximums[name] for name, weight in PRIORITY_WEIGHTS.items())
+                  for c in criteria]
+    return sorted(zip(priorities, hotels), key=lambda priority_and_hotel: -priority_and_hotel[0])
+
+
+def select_hotels(hotels, workers, last_visits=None, today=None, visits_per_worker=HOTELS_PER_ROUTE):
+    """
+    Keep, in each sector, the hotels of highest priority that the couples of the sector can visit.
+
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+        last_visits (dict[str: date]): date of the last visit of the hotels, by label
+        today (date):
+        visits_per_worker (int): number of hotels a couple can visit, in a single route
+
+    Returns:
+        list[Hotel]: at most `visits_per_worker` hotels per couple, highest priority first
+    """
+    visits_per_sector = {}
+    for worker in workers:
+        visits_per_sector[worker.sector] = visits_per_sector.get(worker.sector, 0) + visits_per_worker
+
+    selected = []
+    for _, hotel in rank_hotels(hotels, last_visits, today):
+        sector = sector_from_postcode(hotel.postcode)
+        if visits_per_sector.get(sector, 0) > 0:
+            visits_per_sector[sector] -= 1
+            selected.append(hotel)
+
+    print('{} hotels selected out of {}'.format(len(selected), len(hotels)))
+    return selected
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.
@@ -1,6 +1,9 @@
+import time
+
 from ortools.sat.python import cp_model
 
 from src.domain.utils import SolverStatus
+from src.services import capture, telemetry
 
 RESULTS_COUNT_LIMIT = 10
 
@@ -24,7 +27,7 @@ def create_couples(persons):
     return list_of_couples
 
 
-def create_model(persons, list_of_couples, dispos_per_person, sector_per_person):
+def create_model(persons, list_of_couples, dispos_per_person, sector_per_person, symmetry_breaking=False):
     """
     Build the model
 
@@ -33,6 +36,8 @@ def create_model(persons, list_of_couples, dispos_per_person, sector_per_person)
         list_of_couples (list[set(str)]):
         dispos_per_person (dict[str: list[int]):
         sector_per_person (dict[str: int]):
+        symmetry_breaking (bool): only allow one of the configurations that only differ by
+            a permutation of interchangeable persons
 
     Returns:
         model (CpModel),
@@ -70,10 +75,91 @@ def create_model(persons, list_of_couples, dispos_per_person, sector_per_person)
         if sector_per_couple[i] is False or len(dispos_per_couple[i]) == 0:
             model.Add(couples[i] == False)
 
+    if symmetry_breaking:
+        class_per_person = equivalence_classes(persons, dispos_per_person, sector_per_person)
+        add_symmetry_breaking_constraints(model, persons, list_of_couples, couples, class_per_person)
+
     return model, couples, dispos_per_couple, sector_per_couple
 
 
-def exploration(persons, dispos_per_person, sector_per_person):
+def equivalence_classes(persons, dispos_per_person, sector_per_person):
+    """
+    Persons with the same disponibilities and sector are interchangeable in the model
+
+    Args:
+        persons (list[str]):
+        dispos_per_person (dict[str: list[int]):
+        sector_per_person (dict[str: int]):
+
+    Returns:
+        class_per_person (dict[str: int]): the classes are numbered by order of first appearance
+    """
+    classes = {}
+    class_per_person = {}
+    for p in persons:
+        dispos = (tuple(d) if isinstance(d, list) else d for d in dispos_per_person[p])
+        key = (tuple(sorted(dispos)), sector_per_person[p])
+        class_per_person[p] = classes.setdefault(key, len(classes))
+    return class_per_person
+
+
+def add_symmetry_breaking_constraints(model, persons, list_of_couples, couples, class_per_person):
+    """
+    Order the members of each class of interchangeable persons by the class of their partner.
+
+    The key of a member is the rank of the class of its partner, the highest key if the partner is
+    in the same class, 0 if it is alone. Permuting the members of a class does not change the keys
+    of the members of the other classes, so any configuration can be permuted into one where, in each
+    class, keys are non-increasing and the members paired together are consecutive.
+
+    Args:
+        model (CpModel):
+        persons (list[str]):
+        list_of_couples (list[set(str)]):
+        couples (dict[int: NewBoolVar]):
+        class_per_person (dict[str: int]):
+    """
+    same_class_key = len(set(class_per_person.values())) + 1
+    couple_index = {frozenset(couple): i for i, couple in enumerate(list_of_couples) if len(couple) == 2}
+
+    members_per_class = {}
+    for p in persons:
+        members_per_class.setdefault(class_per_person[p], []).append(p)
+
+    for members in members_per_class.values():
+        if len(members) < 2:
+            continue
+        partner_keys = []
+        for p in members:
+            partner_keys.append(sum(
+                (same_class_key if class_per_person[q] == class_per_person[p] else class_per_person[q] + 1)
+                * couples[couple_index[frozenset((p, q))]]
+                for q in persons if q != p
+            ))
+        for key, next_key in zip(partner_keys, partner_keys[1:]):
+            model.Add(key >= next_key)
+
+        # The members paired together come first, and are paired two by two in order
+        for p1, p2 in zip(members[::2], members[1::2]):
+            paired_in_class = sum(couples[couple_index[frozenset((p1, q))]] for q in members if q != p1)
+            model.Add(couples[couple_index[frozenset((p1, p2))]] >= paired_in_class)
+
+
+def canonical_form(assignments, class_per_person):
+    """
+    Configurations having the same canonical form only differ by a permutation of interchangeable persons
+
+    Args:
+        assignments (dict[tuple(str,str): list[int]):
+        class_per_person (dict[str: int]):
+
+    Returns:
+        tuple
+    """
+    return tuple(sorted(tuple(sorted((class_per_person[p1], class_per_person[p2]))) for p1, p2 in assignments))
+
+
+def exploration(persons, dispos_per_person, sector_per_person, time_limit=None, symmetry_breaking=True):
     """
     First iteration of the solver, that find the cost of the best configuration possible
 
@@ -81,17 +167,40 @@ def exploration(persons, dispos_per_person, sector_per_person):
         persons (list[str]):
         dispos_per_person (dict[str: list[int]):
         sector_per_person (dict[str: int]):
+        time_limit (float): seconds after which the best configuration found so far is returned
+        symmetry_breaking (bool): see `create_model`
+
+    Returns:
+        status (str),
+        assignments(dict[tuple(str,str): list[int]),
+        maximisation (int):
+    """
+    status, assignments, maximisation, _ = exploration_with_bound(persons,
+                                                                  dispos_per_person,
+                                                                  sector_per_person,
+                                                                  time_limit,
+                                                                  symmetry_breaking)
+    return status, assignments, maximisation
+
+
+def exploration_with_bound(persons, dispos_per_person, sector_per_person, time_limit=None, symmetry_breaking=True):
+    """
+    Same as `exploration`, also returning the best bound of the objective proven by the solver.
+    The status is MODEL_SAT instead of OPTIMAL when the time limit was reached before the proof,
+    and UNKNOWN when it was reached before any solution.
 
     Returns:
         status (str),
         assignments(dict[tuple(str,str): list[int]),
         maximisation (int):
+        bound (int):
     """
     list_of_couples = create_couples(persons)
     model, couples, dispos_per_couples, sector_per_couples = create_model(persons,
                                                                           list_of_couples,
                                                                           dispos_per_person,
-                                                                          sector_per_person)
+                                                                          sector_per_person,
+                                                                          symmetry_breaking)
 
     # model.Maximize(sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)))
 
@@ -99,23 +208,57 @@ def exploration(persons, dispos_per_person, sector_per_person):
     model.Maximize(sum(max_dispo*couples[i] for i, couple in enumerate(list_of_couples))
                    + sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)))
 
+    record = telemetry.start('couples_exploration', **model_size(model, persons, list_of_couples))
     solver = cp_model.CpSolver()
-    status = solver.Solve(model)
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
+    status = solver.SolveWithSolutionCallback(model, ObjectiveTelemetryCallback(record))
     status = solver.StatusName(status)
 
     if SolverStatus.success(status):
+        telemetry.finish(record, status, solver.ObjectiveValue(), solver.BestObjectiveBound(),
+                         **search_statistics(solver))
         satisfaction_assignment = save_solutions(solver, list_of_couples, couples, dispos_per_couples, sector_per_person)
-        return status, satisfaction_assignment, solver.ObjectiveValue()
+        return status, satisfaction_assignment, solver.ObjectiveValue(), solver.BestObjectiveBound()
 
     else:
+        telemetry.finish(record, status, **search_statistics(solver))
         print('Cannot find couples :\'(')
-        return status, {}, 0
+        return status, {}, 0, 0
+
+
+def model_size(model, persons, list_of_couples):
+    """Size of the couple model, for the telemetry"""
+    proto = model.Proto()
+    return {
+        'persons': len(persons),
+        'couples': len(list_of_couples),
+        'variables': len(proto.variables),
+        'constraints': len(proto.constraints),
+    }
+
+
+def search_statistics(solver):
+    """Statistics of the last search of the CpSolver, for the telemetry"""
+    return {'branches': solver.NumBranches(), 'conflicts': solver.NumConflicts(), 'solver_wall_time': solver.WallTime()}
+
+
+class ObjectiveTelemetryCallback(cp_model.CpSolverSolutionCallback):
+    """Save the objective of each solution found in the telemetry record"""
+
+    def __init__(self, record):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.record = record
+
+    def NewSolution(self):
+        telemetry.add_solution(self.record, self.ObjectiveValue())
 
 
 class VarArrayAndObjectiveSolutionPrinter(cp_model.CpSolverSolutionCallback):
     """Print and save solutions."""
 
-    def __init__(self, variables, list_of_couples, dispos_per_couples, sector_per_person):
+    def __init__(self, variables, list_of_couples, dispos_per_couples, sector_per_person, class_per_person=None,
+                 record=None):
         cp_model.CpSolverSolutionCallback.__init__(self)
         self.__variables = variables
         self.__solution_count = 0
@@ -124,14 +267,26 @@ class VarArrayAndObjectiveSolutionPrinter(cp_model.CpSolverSolutionCallback):
         self.list_of_couples = list_of_couples
         self.dispos_per_couples = dispos_per_couples
         self.sector_per_person = sector_per_person
+        # When given, solutions equivalent to an already saved one are not saved
+        self.class_per_person = class_per_person
+        self.canonical_forms = set()
+        # When given, the solutions found are saved in this telemetry record
+        self.record = record
 
     def save_solutions(self, solution):
         print('Solution {}'.format(self.__solution_count))
         assignments = save_solutions(self, self.list_of_couples, solution, self.dispos_per_couples, self.sector_per_person)
+        if self.class_per_person is not None:
+            form = canonical_form(assignments, self.class_per_person)
+            if form in self.canonical_forms:
+                return
+            self.canonical_forms.add(form)
         self.solutions.append(assignments)
 
     def NewSolution(self):
         self.__solution_count += 1
+        if self.record is not None:
+            telemetry.add_solution(self.record, None)
         self.save_solutions(self.__variables)
         # if self.__solution_count >= self.__solution_limit:
         #     self.StopSearch() # TODO implemetn
@@ -140,7 +295,7 @@ class VarArrayAndObjectiveSolutionPrinter(cp_model.CpSolverSolutionCallback):
         return self.__solution_count
 
 
-def satisfaction(persons, dispos_per_person, sector_per_person, maximisation):
+def satisfaction(persons, dispos_per_person, sector_per_person, maximisation, time_limit=None, symmetry_breaking=True):
     """
     Second iteration of the solver, that finds all configurations of couple, respecting the given maximisation cost
 
@@ -149,13 +304,17 @@ def satisfaction(persons, dispos_per_person, sector_per_person, maximisation):
         dispos_per_person (dict[str: list[int]):
         sector_per_person (dict[str: int]):
         maximisation (int):
+        time_limit (float): seconds after which the configurations found so far are returned
+        symmetry_breaking (bool): see `create_model`, the configurations equivalent to an already found one
+            are not returned either
 
     Returns:
         status (str),
         assignments (list[dict[tuple(str,str): list[int]]]])
     """
     list_of_couples = create_couples(persons)
-    model, couples, dispos_per_couples, sector_per_couples = create_model(persons, list_of_couples, dispos_per_person, sector_per_person)
+    model, couples, dispos_per_couples, sector_per_couples = create_model(persons, list_of_couples, dispos_per_person,
+                                                                          sector_per_person, symmetry_breaking)
 
     # model.Add(sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)) == int(maximisation))
 
@@ -163,17 +322,28 @@ def satisfaction(persons, dispos_per_person, sector_per_person, maximisation):
     model.Add(sum(max_dispo*couples[i] for i, couple in enumerate(list_of_couples))
              + sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)) == int(maximisation))
 
+    class_per_person = None
+    if symmetry_breaking:
+        class_per_person = equivalence_classes(persons, dispos_per_person, sector_per_person)
+    record = telemetry.start('couples_satisfaction', **model_size(model, persons, list_of_couples))
     solution_printer = VarArrayAndObjectiveSolutionPrinter(couples,
                                                            list_of_couples,
                                                            dispos_per_couples,
-                                                           sector_per_person)
+                                                           sector_per_person,
+                                                           class_per_person,
+                                                           record)
     solver = cp_model.CpSolver()
+    if time_limit:
+        solver.parameters.max_time_in_seconds = time_limit
 
     status = solver.SearchForAllSolutions(model, solution_printer)
     status = solver.StatusName(status)
+    telemetry.finish(record, status, int(maximisation), solutions_saved=len(solution_printer.solutions),
+                     **search_statistics(solver))
 
     assignements = []
-    if status not in ['INFEASIBLE', 'MODEL_INVALID', 'UNKNOWN']:
+    # When the time limit is reached, the status may be UNKNOWN even though solutions were found
+    if status not in ['INFEASIBLE', 'MODEL_INVALID', 'UNKNOWN'] or time_limit:
         assignements = solution_printer.solutions
     return status, assignements
 
@@ -204,20 +374,115 @@ def save_solutions(solver, list_of_couples, couples, dispos_per_couples, sector_
     return assigments
 
 
-def solve_couples(employees):
-    persons = [p['name'] for p in employees]
-    disponibility_per_person = {p['name']: p['availabilities'] for p in employees}
-    sector_per_person = {p['name']: p['sector'] for p in employees}
+def solve_couples(employees, time_limit=None):
+    """
+    Args:
+        employees (list[Employee]):
+        time_limit (float): seconds after which the best configurations found so far are returned
+
+    Returns:
+        assignments (list[dict[tuple(str,str): list[int]]]])
+    """
+    return solve_couples_anytime(employees, time_limit)['assignments']
+
+
+def solve_couples_anytime(employees, time_limit=None):
+    """
+    Args:
+        employees (list[Employee]):
+        time_limit (float): total seconds given to the exploration and the satisfaction
+
+    Returns:
+        dict: the `assignments` found, their `objective`, the `bound` proven on the objective, the relative
+            `gap` between them and the `status`: OPTIMAL when the objective is proven optimal,
+            TIME_LIMITED when the time limit stopped the search before
+    """
+    deadline = time.time() + time_limit if time_limit else None
+    # Employees without sector cannot be paired
+    employees = [p for p in employees if p.sector]
+    persons = [p.name for p in employees]
+    disponibility_per_person = {p.name: p.availabilities for p in employees}
+    sector_per_person = {p.name: p.sector for p in employees}
+    if len(persons) < 2:
+        print('Not enough employees with a sector to form couples')
+        return {'status': SolverStatus.INFEASIBLE, 'assignments': [], 'objective': None, 'bound': None, 'gap': None}
+    capture.capture_couples(persons, disponibility_per_person, sector_per_person)
 
     print('---- Exploration ----')
-    exploration_status, exploration_assignments, maximisation = exploration(persons,
-                                                                            disponibility_per_person,
-                                                                            sector_per_person)
+    exploration_status, exploration_assignments, maximisation, bound = exploration_with_bound(persons,
+                                                                                              disponibility_per_person,
+                                                                                              sector_per_person,
+                                                                                              time_limit)
+    if not SolverStatus.success(exploration_status):
+        if time_limit and exploration_status == SolverStatus.UNKNOWN:
+            print('No feasible pairing within the time limit of {}s'.format(time_limit))
+        return {'status': exploration_status, 'assignments': [], 'objective': None, 'bound': None, 'gap': None}
 
     print('---- Satisfaction ----')
     satisfaction_status, satisfaction_assignments = satisfaction(persons,
                                                                  disponibility_per_person,
                                                                  sector_per_person,
-                                                                 maximisation)
+                                                                 maximisation,
+                                                                 max(deadline - time.time(), 0.01) if deadline else None)
+    if not satisfaction_assignments:
+        # No time left to enumerate the configurations, keep the one found by the exploration
+        satisfaction_assignments = [exploration_assignments]
+
+    return {
+        'status': SolverStatus.OPTIMAL if exploration_status == SolverStatus.OPTIMAL else SolverStatus.TIME_LIMITED,
+        'assignments': satisfaction_assignments,
+        'objective': maximisation,
+        'bound': bound,
+        'gap': abs(bound - maximisation) / max(abs(maximisation), 1),
+    }
+
+
+def update_couples(previous_assignments, employees, changed_persons=()):
+    """
+    Update a configuration of couples after a change of the roster, without re-solving the whole roster.
+
+    The couples whose both persons are still in the roster and unchanged are kept as they are. Only the
+    persons affected by the change (their former partners, the changed persons) and the unpaired persons
+    that could be paired with them are re-solved.
 
-    return satisfaction_assignments
+    Args:
+        previous_assignments (dict[tuple(str,str): list[int]): the configuration to update
+        employees (list[Employee]): the current roster, the persons who are no longer in it cancelled
+        changed_persons (list[str]): persons added to the roster, or whose disponibilities or sector changed
+
+    Returns:
+        assignments (dict[tuple(str,str): list[int])
+    """
+    # Employees without sector cannot be paired
+    employees = [p for p in employees if p.sector]
+    persons = [p.name for p in employees]
+    dispos_per_person = {p.name: p.availabilities for p in employees}
+    sector_per_person = {p.name: p.sector for p in employees}
+    changed_persons = set(changed_persons) & set(persons)
+
+    assignments = {}
+    affected_persons = set(changed_persons)
+    for couple, value in previous_assignments.items():
+        if all(p in dispos_per_person and p not in changed_persons for p in couple):
+            assignments[couple] = value
+        else:
+            affected_persons.update(p for p in couple if p in dispos_per_person)
+
+    coupled_persons = {p for couple in assignments for p in couple}
+    neighbourhood = [p for p in persons if p not in coupled_persons and (
+        p in affected_persons or
+        any(_compatible(p, q, dispos_per_person, sector_per_person) for q in affected_persons)
+    )]
+    print('{} persons to re-pair, {} couples kept'.format(len(neighbourhood), len(assignments)))
+    if len(neighbourhood) < 2:
+        return assignments
+
+    status, neighbourhood_assignments, _ = exploration(neighbourhood, dispos_per_person, sector_per_person)
+    assignments.update(neighbourhood_assignments)
+    return assignments
+
+
+def _compatible(p1, p2, dispos_per_person, sector_per_person):
+    return (p1 != p2
+            and (sector_per_person[p1] & sector_per_person[p2]) != 0
+            and any(d in dispos_per_person[p2] for d in dispos_per_person[p1]))
@@ -0,0 +1,68 @@
+"""
+Merge the hotels sharing a building, or close enough to be visited together, into a single routing node.
+
+Each group is a `HotelGroup` node of the routing problem, with a demand equal to its number of hotels,
+so the distance matrix and the search space shrink in the dense arrondissements. The groups are
+expanded back into the labels of their hotels in the itinerary.
+"""
+import math
+
+import numpy as np
+
+from src.domain.distances import EARTH_RADIUS, distances_block
+from src.domain.entities import HotelGroup
+
+AGGREGATION_RADIUS = 50  # meters, distance to the first hotel of a group under which a hotel joins the group
+METERS_PER_DEGREE = EARTH_RADIUS * 1000 * math.pi / 180
+
+
+def aggregate_hotels(hotels, radius=AGGREGATION_RADIUS, max_hotels=None):
+    """
+    Args:
+        hotels (list[Hotel]):
+        radius (float): maximum distance (meters) between a hotel and the first hotel of its group,
+            0 only merges the hotels at the exact same coordinates
+        max_hotels (int): maximum number of hotels in a group, e.g. the number of visits of a worker
+
+    Returns:
+        list[HotelGroup]: the groups, in the order of their first hotel. The hotels without point are
+            alone in their group
+    """
+    located = [h for h in hotels if h.point]
+    if not located:
+        return [HotelGroup.from_hotels([h]) for h in hotels]
+
+    # Hotels are bucketed in a grid of cells at least `radius` wide, so that each hotel is only
+    # compared to the groups of the 9 cells around it
+    max_latitude = max(abs(h.point.latitude) for h in located)
+    cell_size = max(radius / (METERS_PER_DEGREE * math.cos(math.radians(max_latitude))), 1e-9)
+
+    groups = []
+    groups_per_cell = {}
+    for hotel in hotels:
+        if not hotel.point:
+            groups.append([hotel])
+            continue
+
+        row, column = int(hotel.point.latitude // cell_size), int(hotel.point.longitude // cell_size)
+        candidates = [g for r in (row - 1, row, row + 1) for c in (column - 1, column, column + 1)
+                      for g in groups_per_cell.get((r, c), []) if max_hotels is None or len(g) < max_hotels]
+        group = _closest_group(hotel, candidates, radius)
+        if group is None:
+            group = [hotel]
+            groups.append(group)
+            groups_per_cell.setdefault((row, column), []).append(group)
+        else:
+            group.append(hotel)
+
+    return [HotelGroup.from_hotels(group) for group in groups]
+
+
+def _closest_group(hotel, groups, radius):
+    if not groups:
+        return None
+    point = np.array([[hotel.point.latitude, hotel.point.longitude]])
+    first_points = np.array([(g[0].point.latitude, g[0].point.longitude) for g in groups])
+    distances = distances_block(point, first_points)[0]
+    closest = int(np.argmin(distances))
+    return groups[closest] if distances[closest] <= radius else None
@@ -0,0 +1,48 @@
+"""
+Sectors of the Samu Social: each département of Ile-de-France belongs to one sector,
+and each sector has a depot from which the couples of workers start their visits.
+"""
+
+SECTORS_COMPATIBILITY = {
+    75: 1,
+    77: 2,
+    91: 2,
+    94: 2,
+    78: 3,
+    92: 3,
+    95: 3,
+    93: 4,
+}
+
+SECTOR_COORDINATES = {1: {'latitude': 48.852969, 'longitude' : 2.349894},
+                      2: {'latitude': 48.582882, 'longitude': 2.499829},
+                      3: {'latitude': 48.938204, 'longitude': 1.997205},
+                      4: {'latitude': 48.909555, 'longitude': 2.445373}}
+
+
+def sector_from_departement(departement):
+    """
+    Args:
+        departement (str|int): number of the département, e.g. 75
+
+    Returns:
+        sector (int): None if the département is unknown or out of the sectors
+    """
+    try:
+        return SECTORS_COMPATIBILITY.get(int(departement))
+    except (TypeError, ValueError):
+        return None
+
+
+def sector_from_postcode(postcode):
+    """
+    Args:
+        postcode (str|int): e.g. '75012'
+
+    Returns:
+        sector (int): None if the postcode is not in one of the sectors
+    """
+    postcode = str(postcode or '').strip()
+    if len(postcode) != 5:
+        return None
+    return sector_from_departement(postcode[:2])
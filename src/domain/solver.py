@@ -7,22 +7,42 @@ Determine an optimal list of hotel to visit.
     Note that the first record should be the adress of the starting point (let's say the HQ of the Samu Social)
 """
 import argparse
-import numpy as np
-
+import os
+import tempfile
+import time
+from multiprocessing import Pool, cpu_count
 
 from ortools.constraint_solver import pywrapcp
 from ortools.constraint_solver import routing_enums_pb2
 
-from src.services.map import Map
+from src.domain.distances import build_distances_matrix, load_distances_matrix, nearest_neighbours
+from src.domain.entities import Hotel, HotelGroup
+from src.domain.node_aggregation import aggregate_hotels
+from src.domain.sectors import sector_from_postcode
+from src.domain.utils import SolverStatus
+from src.services import capture, telemetry
 from src.services.csv_reader import parse_csv
 
 MAX_DISTANCE = 15000  # Maximum distance (meters) that a worker can cover in a day
 MAX_VISIT_PER_DAY = 8  # Maximum number of various hotel a worker can cover within a day
-
-
-def get_distances_matrix(hotels, workers):
+HOTELS_PER_ROUTE = MAX_VISIT_PER_DAY - 1  # The start of a route has a demand of 1 too
+NEAREST_NEIGHBOURS = 10  # Number of closest hotels a worker can go to next, in the sparse routing
+DROP_PENALTY = 1000000  # Cost (meters) of not visiting a hotel, above any detour to visit it
+TIME_LIMIT_TOLERANCE = 0.95  # Share of the time limit after which a search is considered stopped by the deadline
+PORTFOLIO_TIME_LIMIT_MS = 30000  # Wall time budget of the routing portfolio
+PORTFOLIO_STRATEGIES = [  # (first solution strategy, local search metaheuristic) run by the portfolio
+    ("PATH_CHEAPEST_ARC", "GUIDED_LOCAL_SEARCH"),
+    ("SAVINGS", "GUIDED_LOCAL_SEARCH"),
+    ("PARALLEL_CHEAPEST_INSERTION", "GUIDED_LOCAL_SEARCH"),
+    ("PATH_CHEAPEST_ARC", "TABU_SEARCH"),
+    ("PATH_MOST_CONSTRAINED_ARC", "SIMULATED_ANNEALING"),
+    ("LOCAL_CHEAPEST_INSERTION", "TABU_SEARCH"),
+]
+
+
+def get_distances_matrix(hotels, workers, path=None, hotels_distances=None):
     """Compute the distance matrix (distance between each hotels).
-    Returns a triangular matrix and the labels of the hotels.
+    Returns a square matrix and the labels of the hotels.
 
     Note:
         1) That the first address shall be the address of the depot.
@@ -31,69 +51,62 @@ def get_distances_matrix(hotels, workers):
 
 
     Args: 
-        hotels (list[dict]): list of address, each dict has the struct
-            {'address': 'Avenue Winston Churchill', 'postcode': 27000}
-        workers (dict(int: int))
+        hotels (list[Hotel]): list of hotels, with their address, postcode and point
+        workers (list[Worker])
+        path (str): file where to store the matrix, memory-mapped. For big node sets,
+            a temporary file is used if not given
+        hotels_distances (np.array): distances between the hotels, see `get_hotels_distances_matrix`
     Returns:
-        distances(list[list[int]]): matrix of distances
-        labels(dict[int, string]): the index of the address and it's name
-
-    Warnings:
-        Function seems to break if size of input hotels is too big ? Returns empty distances
-        that leads to a segmentation fault down the processing pipeline.
+        distances(np.array): int32 matrix of distances, in meters
+        labels(list[string]): the address of each node, by index
 
     """
-    map = Map()
-    distances = []
-    labels = dict()
-    index = 0
-    hotels_and_workers = workers + workers + hotels
-
-    for hotel1 in hotels_and_workers:
-        src_address = {
-            "address": hotel1.get("address"),
-            "postcode": hotel1.get("postcode"),
-        }
-        # point1 = map.point(src_address)
-        point1 = hotel1["point"]
-        src_dist = []
-        if not point1:
-            continue
-
-        labels[index] = "{} {}".format(
-            src_address.get("address"), src_address.get("postcode")
-        )  # Store the address as labels for the node
-        index = index + 1
-        for hotel2 in hotels_and_workers:
-            target_address = {
-                "address": hotel2.get("address"),
-                "postcode": hotel2.get("postcode"),
-            }
-            # point2 = map.point(target_address)
-            point2 = hotel2["point"]
-
-            if not point2:
-                continue
-
-            distance = map.distance(point1, point2)
-            distance = int(np.round(distance * 1000))  # Distance expressed in meters
-            src_dist.append(distance)
-
-        if src_dist:
-            distances.append(src_dist)
+    # If the API doesn't return a point for the address, the location is dropped
+    hotels_and_workers = [entity for entity in workers + workers + hotels if entity.point]
+
+    labels = [format_label(entity) for entity in hotels_and_workers]  # Store the address as labels for the node
+    distances = build_distances_matrix([entity.point for entity in hotels_and_workers], path=path,
+                                       known_distances=hotels_distances)
 
     return distances, labels
 
 
+def get_hotels_distances_matrix(hotels):
+    """
+    Distances between the hotels only, that can be computed before the couples of workers are known.
+
+    Args:
+        hotels (list[Hotel]):
+
+    Returns:
+        np.array: int32 matrix of distances between the hotels with a point, in meters
+    """
+    return build_distances_matrix([hotel.point for hotel in hotels if hotel.point])
+
+
+def format_label(entity):
+    return "{} {}".format(entity.address, entity.postcode)
+
+
 ###########################
 # Problem Data Definition #
 ###########################
-def create_data_model(hotels, workers, from_raw_data):
+def create_data_model(hotels, workers, from_raw_data, distances_path=None, drop_penalty=None,
+                      aggregation_radius=None, neighbours=None, max_distance=None, hotels_distances=None):
     """Creates the data for the example.
     Args:
-        hotels(list[dict])
-        workers(dict(int: int): number of couple of Samu Social workers available
+        hotels(list[Hotel])
+        workers(list[Worker]): couples of Samu Social workers available
         from_raw_data(bool):
+        distances_path(str): file where to store the memory-mapped distance matrix
+        drop_penalty(int): cost of not visiting a hotel. If not given, all the hotels must be visited
+        aggregation_radius(float): if given, the hotels within this radius (meters) are merged in a single node,
+            see `aggregate_hotels`
+        neighbours(int): if given, a worker can only go from a hotel to its `neighbours` closest hotels,
+            or back to a depot
+        max_distance(int): maximum distance (meters) covered by a worker, not bounded if not given
+        hotels_distances(np.array): distances between the hotels, already computed. Not used with
+            `aggregation_radius`, that changes the nodes
     """
     data = {}
     n_workers = len(workers)
@@ -110,10 +123,15 @@ def create_data_model(hotels, workers, from_raw_data):
 
     # Matrix of distances between locations.
     if from_raw_data:
-        hotels_data = parse_csv(hotels, "hotel", write=False)
+        hotels_data = [Hotel.from_record(h) for h in parse_csv(hotels, "hotel", write=False)]
     else:
         hotels_data = hotels
-    _distances, labels = get_distances_matrix(hotels_data, workers)
+    if aggregation_radius is not None:
+        # A group must still fit in a single route
+        hotels_data = aggregate_hotels(hotels_data, aggregation_radius, HOTELS_PER_ROUTE)
+        hotels_distances = None
+    _distances, labels = get_distances_matrix(hotels_data, workers, path=distances_path,
+                                              hotels_distances=hotels_distances)
     data["distances"] = _distances
     data["labels"] = labels
     num_locations = len(_distances)
@@ -122,10 +140,19 @@ def create_data_model(hotels, workers, from_raw_data):
     # The problem is to find an assignment of routes to vehicles that has the shortest total distance
     # and such that the total amount a vehicle is carrying never exceeds its capacity. Capacities can be understood
     # as the max number of visits that a worker can do in a day
-    demands = [1] * num_locations
+    # Each group of hotels is a single node, visited as many times as it has hotels
+    nodes = [entity for entity in workers + workers + hotels_data if entity.point]
+    data["members"] = [[format_label(hotel) for hotel in entity.hotels] if isinstance(entity, HotelGroup)
+                       else [format_label(entity)] for entity in nodes]
+    demands = [len(members) for members in data["members"]]
     capacities = [MAX_VISIT_PER_DAY] * n_workers
     data["demands"] = demands
     data["vehicle_capacities"] = capacities
+    data["drop_penalty"] = drop_penalty
+
+    # Sparse arcs: the closest hotels of each hotel, the depots being the first 2 * n_workers nodes
+    data["neighbours"] = nearest_neighbours(_distances, neighbours, 2 * n_workers) if neighbours else None
+    data["max_distance"] = max_distance
 
     return data
 
@@ -139,7 +166,7 @@ def create_distance_callback(data):
 
     def distance_callback(from_node, to_node):
         """Returns the manhattan distance between the two nodes"""
-        return distances[from_node][to_node]
+        return int(distances[from_node, to_node])
 
     return distance_callback
 
@@ -165,6 +192,52 @@ def add_capacity_constraints(routing, data, demand_callback):
     )
 
 
+def add_distance_dimension(routing, data, distance_callback):
+    """Adds the maximum distance covered by each worker"""
+    routing.AddDimension(
+        distance_callback,
+        0,  # null distance slack
+        data["max_distance"],  # maximum distance per vehicle
+        True,  # start cumul to zero
+        "Distance",
+    )
+
+
+def hotels_successors(data):
+    """
+    Hotels a worker can go to from each hotel: its nearest neighbours, and the hotels it is a nearest neighbour of
+
+    Returns:
+        dict[int: set(int)]: successors of each hotel node
+    """
+    first_hotel = 2 * data["num_vehicles"]
+    successors = {node: set(int(n) for n in data["neighbours"][node])
+                  for node in range(first_hotel, data["num_locations"])}
+    # The arcs between hotels are allowed both ways, so that the graph stays connected
+    for node in range(first_hotel, data["num_locations"]):
+        for neighbour in data["neighbours"][node]:
+            successors[int(neighbour)].add(node)
+    return successors
+
+
+def restrict_arcs(routing, data):
+    """
+    Only allows to go from a hotel to its nearest neighbours, or to the end of a route.
+    A worker can still go from its start to any hotel, as all the couples of a sector share the same depot
+    """
+    ends = [routing.End(vehicle) for vehicle in range(data["num_vehicles"])]
+    for node, successors in hotels_successors(data).items():
+        index = routing.NodeToIndex(node)
+        # A hotel being its own successor is not visited
+        routing.NextVar(index).SetValues([routing.NodeToIndex(n) for n in successors] + ends + [index])
+
+
+def add_drop_penalties(routing, data):
+    """Allows to skip the hotels, at the cost of the drop penalty"""
+    for node in range(2 * data["num_vehicles"], data["num_locations"]):
+        routing.AddDisjunction([node], data["drop_penalty"] * data["demands"][node])
+
+
 ###########
 # FORMATTER #
 ###########
@@ -183,10 +256,14 @@ def format_solution(data, routing, assignment):
             route_dist += routing.GetArcCostForVehicle(
                 node_index, next_node_index, vehicle_id
             )
-            route.append(("{0}".format(data["labels"].get(node_index))))
+            if "members" in data:
+                # The groups of hotels are expanded into their hotels
+                route.extend(data["members"][node_index])
+            else:
+                route.append(("{0}".format(data["labels"][node_index])))
             index = assignment.Value(routing.NextVar(index))
         # Add return address to the route
-        route.append((data["labels"].get(routing.IndexToNode(index))))
+        route.append((data["labels"][routing.IndexToNode(index)]))
         plan_output.append(route)
     return plan_output
 
@@ -194,7 +271,8 @@ def format_solution(data, routing, assignment):
 ########
 # Main #
 ########
-def solve_routes(hotels, number_workers, from_raw_data=False):
+def solve_routes(hotels, number_workers, from_raw_data=False, drop_penalty=None, aggregation_radius=None,
+                 neighbours=None, max_distance=None, hotels_distances=None, time_limit=None):
     """
     Entry point of the program
 
@@ -202,13 +280,96 @@ def solve_routes(hotels, number_workers, from_raw_data=False):
         hotels:
         number_workers:
         from_raw_data (bool): should we consider the raw csv file or not
+        drop_penalty (int): cost of not visiting a hotel, so that the problem stays feasible
+            when the workers cannot visit all of them
+        aggregation_radius (float): merge the hotels within this radius (meters) in a single node
+        neighbours (int): only allow the arcs to the `neighbours` closest hotels of each hotel, see `restrict_arcs`
+        max_distance (int): maximum distance (meters) covered by each worker
+        hotels_distances (np.array): distances between the hotels, see `get_hotels_distances_matrix`
+        time_limit (float): seconds after which the search stops, with the best routes found so far
 
     Returns:
 
 
     """
     # Instantiate the data problem.
-    data = create_data_model(hotels, number_workers, from_raw_data)
+    data = create_data_model(hotels, number_workers, from_raw_data, drop_penalty=drop_penalty,
+                             aggregation_radius=aggregation_radius, neighbours=neighbours, max_distance=max_distance,
+                             hotels_distances=hotels_distances)
+
+    # Setting first solution heuristic (cheapest addition).
+    search_parameters = create_search_parameters(time_limit_ms=int(time_limit * 1000) if time_limit else None)
+
+    itinerary, _ = solve_data_model(data, search_parameters)
+    return itinerary
+
+
+def solve_routes_anytime(hotels, workers, time_limit, **routing_options):
+    """
+    Search the routes until the deadline and return the best ones found so far.
+
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+        time_limit (float): seconds given to the search, distance matrix excluded
+        routing_options: see `create_data_model`, e.g. `drop_penalty`, `aggregation_radius`, `neighbours`
+
+    Returns:
+        dict: the `itinerary` found and its `objective` (total distance), with the `status`:
+            TIME_LIMITED when the deadline stopped the search, FEASIBLE when the search ended before it,
+            INFEASIBLE when no routes were found. The routing search does not prove any `bound` (None).
+    """
+    data = create_data_model(hotels, workers, False, **routing_options)
+    search_parameters = create_search_parameters(local_search_metaheuristic="GUIDED_LOCAL_SEARCH",
+                                                 time_limit_ms=time_limit * 1000)
+    start = time.time()
+    itinerary, cost = solve_data_model(data, search_parameters)
+    elapsed = time.time() - start
+
+    if itinerary is None:
+        status = SolverStatus.INFEASIBLE
+    elif elapsed >= TIME_LIMIT_TOLERANCE * time_limit:
+        status = SolverStatus.TIME_LIMITED
+    else:
+        status = SolverStatus.FEASIBLE
+    return {'status': status, 'itinerary': itinerary, 'objective': cost, 'bound': None, 'gap': None}
+
+
+def create_search_parameters(first_solution_strategy="PATH_CHEAPEST_ARC", local_search_metaheuristic=None,
+                             time_limit_ms=None):
+    """
+    Args:
+        first_solution_strategy (str): name of a routing_enums_pb2.FirstSolutionStrategy
+        local_search_metaheuristic (str): name of a routing_enums_pb2.LocalSearchMetaheuristic,
+            the default local search is used if not given
+        time_limit_ms (int): stop the search after this time. Required with a metaheuristic,
+            that would otherwise never stop
+    """
+    search_parameters = pywrapcp.RoutingModel.DefaultSearchParameters()
+    search_parameters.first_solution_strategy = getattr(
+        routing_enums_pb2.FirstSolutionStrategy, first_solution_strategy
+    )
+    if local_search_metaheuristic:
+        search_parameters.local_search_metaheuristic = getattr(
+            routing_enums_pb2.LocalSearchMetaheuristic, local_search_metaheuristic
+        )
+    if time_limit_ms:
+        search_parameters.time_limit_ms = int(time_limit_ms)
+    return search_parameters
+
+
+def solve_data_model(data, search_parameters):
+    """
+    Args:
+        data (dict): problem data, as built by `create_data_model`
+        search_parameters (RoutingSearchParameters):
+
+    Returns:
+        itinerary (list[list[str]]): None if no solution is found
+        cost (int): total distance of the routes, in meters
+    """
+    capture.capture_routing(data)
+
     # Create Routing Model
     routing = pywrapcp.RoutingModel(
         data["num_locations"],
@@ -224,19 +385,140 @@ def solve_routes(hotels, number_workers, from_raw_data=False):
     demand_callback = create_demand_callback(data)
     add_capacity_constraints(routing, data, demand_callback)
 
-    # Setting first solution heuristic (cheapest addition).
-    search_parameters = pywrapcp.RoutingModel.DefaultSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    )
+    if data.get("max_distance"):
+        add_distance_dimension(routing, data, distance_callback)
+
+    if data.get("neighbours") is not None:
+        restrict_arcs(routing, data)
+
+    if data.get("drop_penalty"):
+        add_drop_penalties(routing, data)
+
+    record = telemetry.start("routing", locations=data["num_locations"], vehicles=data["num_vehicles"],
+                             first_solution_strategy=search_parameters.first_solution_strategy,
+                             local_search_metaheuristic=search_parameters.local_search_metaheuristic)
+    routing.AddAtSolutionCallback(lambda: telemetry.add_solution(record, routing.CostVar().Max()))
 
     # Solve the problem.
     assignment = routing.SolveWithParameters(search_parameters)
+    statistics = {"branches": routing.solver().Branches(), "failures": routing.solver().Failures()}
     if assignment:
         itinerary = format_solution(data, routing, assignment)
-        return itinerary
+        telemetry.finish(record, SolverStatus.FEASIBLE, assignment.ObjectiveValue(), **statistics)
+        return itinerary, assignment.ObjectiveValue()
     else:
-        return None
+        telemetry.finish(record, SolverStatus.INFEASIBLE, **statistics)
+        return None, None
+
+
+def solve_routes_portfolio(hotels, workers, time_limit_ms=PORTFOLIO_TIME_LIMIT_MS, strategies=PORTFOLIO_STRATEGIES,
+                           processes=None, **routing_options):
+    """
+    Run several search strategies in parallel on the same problem and keep the best itinerary.
+
+    The distance matrix is computed once and memory-mapped read-only by every process,
+    instead of being pickled to each of them.
+
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+        time_limit_ms (int): wall time budget of the whole portfolio
+        strategies (list[tuple(str, str)]): pairs of first solution strategy and local search metaheuristic
+        processes (int): number of worker processes, defaults to the number of CPUs
+        routing_options: see `create_data_model`, e.g. `drop_penalty`, `aggregation_radius`, `neighbours`
+
+    Returns:
+        itinerary (list[list[str]]): the best itinerary found, None if no strategy found a solution
+    """
+    unknown = ['{} / {}'.format(first_solution_strategy, local_search_metaheuristic)
+               for first_solution_strategy, local_search_metaheuristic in strategies
+               if not hasattr(routing_enums_pb2.FirstSolutionStrategy, first_solution_strategy)
+               or not hasattr(routing_enums_pb2.LocalSearchMetaheuristic, local_search_metaheuristic)]
+    if unknown:
+        raise ValueError('Strategies not provided by this OR-Tools version: {}'.format(', '.join(unknown)))
+
+    processes = min(processes or cpu_count(), len(strategies))
+    # Strategies that do not fit on the processes run in a later round, sharing the budget
+    rounds = -(-len(strategies) // processes)
+    member_time_limit_ms = max(time_limit_ms // rounds, 1)
+
+    fd, distances_path = tempfile.mkstemp(prefix='distances-', suffix='.npy')
+    os.close(fd)
+    try:
+        data = create_data_model(hotels, workers, False, distances_path=distances_path, **routing_options)
+        del data["distances"]  # Each process maps the file instead
+        members = [(data, distances_path, first_solution_strategy, local_search_metaheuristic, member_time_limit_ms)
+                   for first_solution_strategy, local_search_metaheuristic in strategies]
+        with Pool(processes) as pool:
+            results = telemetry.merged(pool.starmap(telemetry.collected,
+                                                    [(_solve_portfolio_member,) + member for member in members]))
+    finally:
+        os.remove(distances_path)
+
+    best_itinerary, best_cost = None, None
+    for (first_solution_strategy, local_search_metaheuristic), (itinerary, cost) in zip(strategies, results):
+        print("Strategy {} / {}: cost {}".format(first_solution_strategy, local_search_metaheuristic, cost))
+        if itinerary is not None and (best_cost is None or cost < best_cost):
+            best_itinerary, best_cost = itinerary, cost
+    return best_itinerary
+
+
+def _solve_portfolio_member(data, distances_path, first_solution_strategy, local_search_metaheuristic,
+                            time_limit_ms):
+    data = dict(data, distances=load_distances_matrix(distances_path))
+    search_parameters = create_search_parameters(first_solution_strategy, local_search_metaheuristic, time_limit_ms)
+    return solve_data_model(data, search_parameters)
+
+
+def solve_routes_per_sector(hotels, workers, processes=None, time_limit=None, **routing_options):
+    """
+    Split the routing problem in one problem per sector, solved in parallel.
+
+    Each hotel is assigned to the sector of its département, so each couple of workers
+    only considers the hotels of its own sector. Hotels out of the sectors are not visited.
+
+    Args:
+        hotels (list[Hotel]):
+        workers (list[Worker]):
+        processes (int): number of worker processes, defaults to the number of CPUs
+        time_limit (float): seconds given to the search of each sector, the sectors being searched in parallel
+        routing_options: see `solve_routes`, e.g. `drop_penalty`, `aggregation_radius`, `neighbours`
+
+    Returns:
+        itinerary (list[list[str]]): the route of each worker, in the same order as `workers`
+    """
+    routing_options = dict(routing_options, time_limit=time_limit)
+    hotels_per_sector = {}
+    for hotel in hotels:
+        sector = sector_from_postcode(hotel.postcode)
+        if sector is not None:
+            hotels_per_sector.setdefault(sector, []).append(hotel)
+
+    workers_per_sector = {}
+    for i, worker in enumerate(workers):
+        workers_per_sector.setdefault(worker.sector, []).append(i)
+
+    sectors = list(workers_per_sector)
+    problems = [(_solve_sector_routes, hotels_per_sector.get(sector, []),
+                 [workers[i] for i in workers_per_sector[sector]], routing_options)
+                for sector in sectors]
+    with Pool(processes) as pool:
+        sector_itineraries = telemetry.merged(pool.starmap(telemetry.collected, problems))
+
+    itinerary = [None] * len(workers)
+    for sector, sector_itinerary in zip(sectors, sector_itineraries):
+        for i, route in zip(workers_per_sector[sector], sector_itinerary):
+            itinerary[i] = route
+    return itinerary
+
+
+def _solve_sector_routes(hotels, workers, routing_options):
+    itinerary = solve_routes(hotels, workers, **routing_options) if hotels else None
+    if itinerary is None:
+        print("No route found for sector {}".format(workers[0].sector))
+        # Workers stay at their depot
+        return [[format_label(w), format_label(w)] for w in workers]
+    return itinerary
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+from datetime import datetime
+
+
 class SolverStatus(object):
     """
     Define how to format the status ouput of the solver
@@ -8,6 +11,7 @@ class SolverStatus(object):
     INFEASIBLE = 'INFEASIBLE'
     MODEL_INVALID = 'MODEL_INVALID'
     UNKNOWN = 'UNKNOWN'
+    TIME_LIMITED = 'TIME_LIMITED'  # Best solution found before the time limit, not proven optimal
 
     @classmethod
     def fail(cls, status):
@@ -25,4 +29,26 @@ class SolverStatus(object):
         :param status: (str)
         :return: bool
         """
-        return status in [cls.OPTIMAL, cls.FEASIBLE]
\ No newline at end of file
+        return status in [cls.OPTIMAL, cls.FEASIBLE, cls.MODEL_SAT, cls.TIME_LIMITED]
+
+
+def availability_slot(day, half_day):
+    """
+    Availability slot of a day, encoded as the zero-padded date followed by 0 (morning) or 1 (afternoon),
+    so that the slots sort chronologically
+
+    :param day: (date)
+    :param half_day: (int) 0 for the morning, 1 for the afternoon
+    :return: int
+    """
+    return int('{:%Y%m%d}{}'.format(day, half_day))
+
+
+def availability_date(availability):
+    """
+    Date of an availability slot, as encoded by `availability_slot`
+
+    :param availability: (int)
+    :return: date
+    """
+    return datetime.strptime(str(availability)[:-1], '%Y%m%d').date()
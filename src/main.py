@@ -1,9 +1,13 @@
 import os
-from datetime import datetime
 
-from src.domain.model_couple import solve_couples
+from src.domain.availability_model import merge_employee
+from src.domain.couples import format_couples_with_positions
+from src.domain.sectors import sector_from_departement
+from src.domain.utils import availability_date
 from src.services.csv_reader import CsvReader
-from src.domain.solver import solve_routes
+from src.services.roster_index import RosterIndex
+from src.services.stages import print_report, run_stages
+from src.services.visit_history import load_last_visits, record_visits
 
 
 ### Should
@@ -17,105 +21,224 @@ HOTELS_DATA_FILE = os.path.join(
 EMPLOYEES_DATA_FILE = os.path.join(
     os.path.dirname(__file__), "..", "data", "enriched-fichier-salarie.csv"
 )
+ROSTER_INDEX_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "data", "roster-index.json"
+)
+LAST_VISITS_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "data", "last-visits.json"
+)
+
 
+def main(incremental=False, per_sector=False, portfolio=False, top_k=None, by_cluster=False, time_limit=None,
+         preselect_hotels=False, aggregation_radius=None, neighbours=None,
+         hotels_file=HOTELS_DATA_FILE, employees_file=EMPLOYEES_DATA_FILE, last_visits_file=LAST_VISITS_FILE,
+         roster_index_file=ROSTER_INDEX_FILE):
+    """
+    Args:
+        incremental (bool): only ingest the employee rows appended since the last plan,
+            merging them into the roster persisted in `roster_index_file`
+        per_sector (bool): solve one routing problem per sector, in parallel
+        portfolio (bool): run several routing search strategies in parallel and keep the best routes
+        top_k (int): route the top_k couple configurations and keep the one with the shortest routes
+        by_cluster (bool): assign a cluster of hotels to each couple, then solve one small TSP per couple.
+            `per_sector`, `portfolio`, `top_k` and `by_cluster` are exclusive routing modes
+        time_limit (float): seconds given to each solver, the best solutions found so far are used.
+            Bounds the routing search whatever the routing strategy
+        preselect_hotels (bool): only route the hotels of highest priority the couples can visit,
+            allowing the solver to drop some of them. The visits planned are recorded in `last_visits_file`,
+            the hotels not visited for a long time coming first in the next plans. Not compatible with `top_k`
+        aggregation_radius (float): route the hotels within this radius (meters) of each other as a single node
+        neighbours (int): sparse routing, a couple only goes from a hotel to its `neighbours` closest hotels
+            and covers at most MAX_DISTANCE meters, the hotels it cannot reach are dropped
+        hotels_file (str): path to the enriched hotels csv file
+        employees_file (str): path to the enriched employees csv file
+        last_visits_file (str): path to the json file of the last visit of each hotel
+        roster_index_file (str): path to the json file of the roster, with `incremental`
+    """
+    if preselect_hotels and top_k:
+        raise ValueError('preselect_hotels cannot be combined with top_k, each configuration needs other hotels')
+    routing_modes = [name for name, enabled in [('per_sector', per_sector), ('portfolio', portfolio),
+                                                ('top_k', top_k), ('by_cluster', by_cluster)] if enabled]
+    if len(routing_modes) > 1:
+        raise ValueError('A single routing mode can be used, not {}'.format(' and '.join(routing_modes)))
+
+    # The solvers are imported on the first plan only, so that importing this module
+    # (e.g. to render the empty form) does not load OR-Tools and NumPy
+    from src.configuration_selection import select_best_configuration
+    from src.domain.model_couple import solve_couples
+    from src.domain.solver import (DROP_PENALTY, MAX_DISTANCE, PORTFOLIO_TIME_LIMIT_MS, get_hotels_distances_matrix,
+                                   solve_routes, solve_routes_anytime, solve_routes_per_sector, solve_routes_portfolio)
+
+    # Options of the routing model, whatever the routing strategy
+    routing_options = {}
+    if preselect_hotels:
+        routing_options['drop_penalty'] = DROP_PENALTY
+    if aggregation_radius is not None:
+        routing_options['aggregation_radius'] = aggregation_radius
+    if neighbours:
+        routing_options.update(neighbours=neighbours, max_distance=MAX_DISTANCE, drop_penalty=DROP_PENALTY)
+
+    def solve_couples_stage(employees):
+        # 1) Call model couple
+        print('=========================================================')
+        print('Start Resolution: Solver 1')
+        print('=========================================================')
+        return solve_couples(employees, time_limit)
+
+    def solve_routes_stage(hotels, employees, assignments, hotels_distances):
+        # 2) Select a date to focus on / filter model_couples
+        # select the point of beginning / ending of each couples
+        # 3) Call solver
+        if not assignments:
+            print('No feasible pairing of the employees{}'.format(' within the time limit' if time_limit else ''))
+            return [], None
+
+        if top_k:
+            print('=========================================================')
+            print('Start Resolution: Solver 2 on the top {} configurations'.format(top_k))
+            print('=========================================================')
+            best_configuration = select_best_configuration(hotels, employees, assignments, top_k,
+                                                           time_limit=time_limit, **routing_options)
+            if best_configuration is None:
+                print('None of the top {} configurations could be routed'.format(top_k))
+                return format_couples_with_positions(employees, assignments[0]), None
+            return best_configuration['workers'], best_configuration['itinerary']
+
+        workers = format_couples_with_positions(employees, assignments[0])
+        print('\n')
+
+        if preselect_hotels:
+            from src.domain.hotel_selection import select_hotels
+            hotels = select_hotels(hotels, workers, load_last_visits(last_visits_file))
+
+        print('=========================================================')
+        print('Start Resolution: Solver 2')
+        print('=========================================================')
+        if per_sector:
+            itinerary = solve_routes_per_sector(hotels, workers, time_limit=time_limit, **routing_options)
+        elif portfolio:
+            time_limit_ms = int(time_limit * 1000) if time_limit else PORTFOLIO_TIME_LIMIT_MS
+            itinerary = solve_routes_portfolio(hotels, workers, time_limit_ms, **routing_options)
+        elif by_cluster:
+            from src.domain.cluster_assignment import solve_routes_by_cluster
+            itinerary, unassigned = solve_routes_by_cluster(hotels, workers, time_limit=time_limit, **routing_options)
+            if unassigned:
+                print('{} hotels cannot be visited by the {} couples: {}'.format(
+                    len(unassigned), len(workers), ', '.join(h.nom for h in unassigned)))
+        elif time_limit:
+            itinerary = solve_routes_anytime(hotels, workers, time_limit, **routing_options)['itinerary']
+        else:
+            itinerary = solve_routes(hotels, workers, hotels_distances=hotels_distances, **routing_options)
+        return workers, itinerary
+
+    # The distances between the hotels do not depend on the couples, they are computed during the couples
+    # resolution. Only the default routing uses them, the other ones work on their own subsets of hotels
+    precompute_distances = not (top_k or per_sector or portfolio or by_cluster or time_limit or preselect_hotels
+                                or aggregation_radius is not None)
+    results, report = run_stages({
+        'hotels': (lambda: load_hotels(hotels_file), []),
+        'employees': (lambda: load_employees(employees_file, incremental, roster_index_file), []),
+        'hotels_distances': (get_hotels_distances_matrix if precompute_distances else lambda hotels: None,
+                             ['hotels']),
+        'couples': (solve_couples_stage, ['employees']),
+        'routes': (solve_routes_stage, ['hotels', 'employees', 'couples', 'hotels_distances']),
+    })
+    workers, itinerary = results['routes']
+
+    format_workers_planning(workers, itinerary)
+    if preselect_hotels:
+        record_visits(last_visits_file, workers)
+
+    print_final_solution(workers)
+
+    print_report(report)
+
+    # 4) API/Mail/print to display solutions
+    # TODO
+    return workers
 
-def main():
+
+def load_hotels_and_employees(hotels_file=HOTELS_DATA_FILE, employees_file=EMPLOYEES_DATA_FILE, incremental=False):
+    """
+    Args:
+        hotels_file (str): path to the enriched hotels csv file
+        employees_file (str): path to the enriched employees csv file
+        incremental (bool): only ingest the employee rows appended since the last plan
+
+    Returns:
+        hotels (list[Hotel]),
+        employees (list[Employee]): with their `availabilities` and `sector`
+    """
+    return load_hotels(hotels_file), load_employees(employees_file, incremental)
+
+
+def load_hotels(hotels_file=HOTELS_DATA_FILE):
+    """
+    Args:
+        hotels_file (str): path to the enriched hotels csv file
+
+    Returns:
+        hotels (list[Hotel])
+    """
     csv_reader = CsvReader()
 
     ### Should
-    # hotels, employees = csv_reader.parse(HOTELS_DATA_FILE, 'hotel'), csv_reader.parse(EMPLOYEES_DATA_FILE, 'people')
+    # hotels = csv_reader.parse(HOTELS_DATA_FILE, 'hotel')
     ### Should not
-    hotels, employees = (
-        csv_reader.parse_enriched(HOTELS_DATA_FILE, "hotel"),
-        csv_reader.parse_enriched(EMPLOYEES_DATA_FILE, "people"),
-    )
+    hotels = csv_reader.parse_enriched(hotels_file, "hotel")
 
     # FIXME: for performances reasons, we have the latitude and longitude
     #        data already inserted in the CSV files
     ### Should
     # _enrich_entity_with_point(map, hotels)
-    # _enrich_entity_with_point(map, employees)
-
-    employees = _enrich_employees_with_availabilities(employees)
-
-    _enrich_employees_with_preferred_sectors(employees)
-
-    # 1) Call model couple
-    print('=========================================================')
-    print('Start Resolution: Solver 1')
-    print('=========================================================')
-    assignments = solve_couples(employees)
 
-    # 2) Select a date to focus on / filter model_couples
-    # select the point of beginning / ending of each couples
-    workers = format_couples_with_positions(employees, assignments[0])
-    print('\n')
+    return hotels
 
-    # 3) Call solver
-    print('=========================================================')
-    print('Start Resolution: Solver 2')
-    print('=========================================================')
-    itinerary = solve_routes(hotels, workers)
 
-    for worker in workers:
-        worker['visits'] = [{
-            'date': datetime.strptime(str(raw_visit_date)[:-1], '%Y%m%d').date().isoformat(),
-            'time': 'Matin' if int(str(raw_visit_date)[-1]) == 0 else 'Après-Midi'}
-            for raw_visit_date in worker['availabilities']]
+def load_employees(employees_file=EMPLOYEES_DATA_FILE, incremental=False, roster_index_file=ROSTER_INDEX_FILE):
+    """
+    Args:
+        employees_file (str): path to the enriched employees csv file
+        incremental (bool): only ingest the employee rows appended since the last plan
+        roster_index_file (str): path to the json file of the roster, with `incremental`
 
-    for i, v in enumerate(itinerary):
-        workers[i]['routes'] = v[1:-1]
+    Returns:
+        employees (list[Employee]): with their `availabilities` and `sector`
+    """
+    if incremental:
+        employees = RosterIndex(roster_index_file).ingest(employees_file, enriched=True)
+    else:
+        employees = CsvReader().parse_enriched(employees_file, "people")
+        employees = list(_enrich_employees_with_availabilities(employees))
 
-    print_final_solution(workers)
+    # FIXME: the latitude and longitude are already inserted in the CSV files
+    # _enrich_entity_with_point(map, employees)
 
-    # 4) API/Mail/print to display solutions
-    # TODO
-    return workers
+    _enrich_employees_with_preferred_sectors(employees)
 
+    return employees
 
-def format_couples_with_positions(employees, assignements):
-    workers = []
-    address_per_person = {p['name']: p['address'] for p in employees}
-    postcode_per_person = {p['name']: p['postcode'] for p in employees}
 
-    for couple, (availability, sector) in assignements.items():
-        p1, p2 = couple
-        workers.append({"name": "{}_and_{}".format(p1, p2),
-                        "address": address_per_person[p1],
-                        "postcode": postcode_per_person[p1],
-                        "point": SECTOR_COORDINATES[sector],
-                        "sector": sector,
-                        "availabilities": availability})
-    return workers
+# /!\ Careful: impure function
+def format_workers_planning(workers, itinerary):
+    for worker in workers:
+        worker.visits = [{
+            'date': availability_date(raw_visit_date).isoformat(),
+            'time': 'Matin' if int(str(raw_visit_date)[-1]) == 0 else 'Après-Midi'}
+            for raw_visit_date in worker.availabilities]
 
+    if itinerary is None:
+        print('No itinerary found for the {} couples'.format(len(workers)))
+        itinerary = [[] for _ in workers]
 
-SECTOR_COORDINATES = {1: {'latitude': 48.852969, 'longitude' : 2.349894},
-                      2: {'latitude': 48.582882, 'longitude': 2.499829},
-                      3: {'latitude': 48.938204, 'longitude': 1.997205},
-                      4: {'latitude': 48.909555, 'longitude': 2.445373}}
+    for i, v in enumerate(itinerary):
+        workers[i].routes = v[1:-1]
 
 
 def _enrich_employees_with_preferred_sectors(employees):
-    sectors_compatibility = {
-        75: 1,
-        77: 2,
-        91: 2,
-        94: 2,
-        78: 3,
-        92: 3,
-        95: 3,
-        93: 4,
-    }
     for employee in employees:
-        if employee["area1"]:
-            employee_preferred_area = int(employee["area1"])
-        else:
-            employee["sector"] = None
-            return
-        if employee_preferred_area not in sectors_compatibility:
-            employee["sector"] = None
-        else:
-            employee["sector"] = sectors_compatibility[int(employee["area1"])]
+        # Employees without a known preferred area cannot be assigned to a sector
+        employee["sector"] = sector_from_departement(employee["area1"])
 
 
 # /!\ Careful: impure function
@@ -130,47 +253,14 @@ def _enrich_entity_with_point(map, entities):
 
 
 def _enrich_employees_with_availabilities(employees):
+    # Grouped as the incremental ingestion does, so that both modes plan with the same roster
     grouped_employees = {}
     for employee in employees:
-        name_and_surname = "{} {}".format(
-            employee["name"].strip(), employee["surname"].strip()
-        )
-        new_availability = process_employee_availability(employee)
-        if name_and_surname not in grouped_employees:
-            grouped_employees[name_and_surname] = employee
-            grouped_employees[name_and_surname]["availabilities"] = new_availability
-        else:
-            new_availability = process_employee_availability(employee)
-            grouped_employees[name_and_surname]["availabilities"] += new_availability
+        merge_employee(grouped_employees, employee)
 
     return grouped_employees.values()
 
 
-def process_employee_availability(employee):
-    availability = datetime.strptime(employee["availability"], "%d/%m/%Y")
-    time_of_day = employee["time_of_day"]
-    if time_of_day.strip().lower() == "jour":
-        morning, afternoon = (
-            "{}{}{}{}".format(
-                availability.year, availability.month, availability.day, 0
-            ),
-            "{}{}{}{}".format(
-                availability.year, availability.month, availability.day, 1
-            ),
-        )
-        return [int(morning), int(afternoon)]
-    elif time_of_day.strip().lower() == "matin":
-        morning = "{}{}{}{}".format(
-            availability.year, availability.month, availability.day, 0
-        )
-        return [int(morning)]
-    else:
-        afternoon = "{}{}{}{}".format(
-            availability.year, availability.month, availability.day, 0
-        )
-        return [int(afternoon)]
-
-
 def print_final_solution(workers):
     for i, worker in enumerate(workers):
         print("---------------------------------")
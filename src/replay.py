@@ -0,0 +1,100 @@
+"""
+Replay a solver stage from the inputs captured with SAMU_CAPTURE_DIR (see `src/services/capture.py`).
+
+Only the captured stage is run, on exactly what the solver received, and timed:
+    ```
+    $ python src/replay.py -c data/captures/couples-20190212-101500-4242-0.json
+    $ python src/replay.py -c data/captures/routing-20190212-101502-4242-1.npz -m GUIDED_LOCAL_SEARCH -t 30
+    ```
+"""
+import argparse
+import time
+
+from src.services.capture import load_couples, load_routing
+
+
+def replay_couples(path, time_limit=None, symmetry_breaking=True):
+    """
+    Args:
+        path (str): captured couple model
+        time_limit (float): seconds given to each of the exploration and the satisfaction
+        symmetry_breaking (bool): see `create_model`
+
+    Returns:
+        dict: `status` and `seconds` of the `exploration` and the `satisfaction`, and the `objective`
+    """
+    from src.domain.model_couple import exploration, satisfaction
+
+    persons, dispos_per_person, sector_per_person = load_couples(path)
+
+    start = time.time()
+    exploration_status, _, maximisation = exploration(persons, dispos_per_person, sector_per_person,
+                                                      time_limit, symmetry_breaking)
+    exploration_seconds = time.time() - start
+
+    start = time.time()
+    satisfaction_status, assignments = satisfaction(persons, dispos_per_person, sector_per_person, maximisation,
+                                                    time_limit, symmetry_breaking)
+    satisfaction_seconds = time.time() - start
+
+    return {
+        'persons': len(persons),
+        'exploration': {'status': exploration_status, 'seconds': exploration_seconds},
+        'satisfaction': {'status': satisfaction_status, 'seconds': satisfaction_seconds,
+                         'configurations': len(assignments)},
+        'objective': maximisation,
+    }
+
+
+def replay_routing(path, first_solution_strategy="PATH_CHEAPEST_ARC", local_search_metaheuristic=None,
+                   time_limit=None):
+    """
+    Args:
+        path (str): captured routing model
+        first_solution_strategy (str): see `create_search_parameters`
+        local_search_metaheuristic (str): see `create_search_parameters`
+        time_limit (float): seconds given to the search
+
+    Returns:
+        dict: `status`, `seconds` and `objective` of the search
+    """
+    from src.domain.solver import create_search_parameters, solve_data_model
+
+    data = load_routing(path)
+    search_parameters = create_search_parameters(first_solution_strategy, local_search_metaheuristic,
+                                                 int(time_limit * 1000) if time_limit else None)
+
+    start = time.time()
+    itinerary, cost = solve_data_model(data, search_parameters)
+    seconds = time.time() - start
+
+    return {
+        'locations': data['num_locations'],
+        'vehicles': data['num_vehicles'],
+        'status': 'FEASIBLE' if itinerary is not None else 'INFEASIBLE',
+        'seconds': seconds,
+        'objective': cost,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a captured solver stage')
+    parser.add_argument('-c', '--capture', help='captured .json (couples) or .npz (routing) file', type=str,
+                        required=True)
+    parser.add_argument('-t', '--time_limit', help='seconds given to the solver', type=float, default=None)
+    parser.add_argument('-f', '--first_solution_strategy', help='routing first solution strategy', type=str,
+                        default="PATH_CHEAPEST_ARC")
+    parser.add_argument('-m', '--metaheuristic', help='routing local search metaheuristic', type=str, default=None)
+    parser.add_argument('--no_symmetry_breaking', help='disable the couple symmetry breaking', action='store_true')
+
+    args = parser.parse_args()
+
+    if args.capture.endswith('.npz'):
+        if args.metaheuristic and not args.time_limit:
+            parser.error('a time limit is required with a metaheuristic')
+        report = replay_routing(args.capture, args.first_solution_strategy, args.metaheuristic, args.time_limit)
+    else:
+        report = replay_couples(args.capture, args.time_limit, not args.no_symmetry_breaking)
+
+    for key, value in report.items():
+        print('{}: {}'.format(key, value))
@@ -0,0 +1,117 @@
+"""
+Plan the visits window by window instead of over the whole availability horizon.
+
+Each window (one week by default) is planned with `solve_couples` and `solve_routes`, then
+committed: the hotels visited are not proposed again in the next windows, and the couples
+formed are kept together as long as both workers are still available together.
+The size of every solve is therefore bounded by the window, whatever how far ahead
+the employees declared their availabilities.
+    ```
+    $ python src/rolling_horizon.py -w 7
+    ```
+"""
+import argparse
+from datetime import timedelta
+
+from src.domain.couples import format_couples_with_positions
+from src.domain.model_couple import solve_couples
+from src.domain.solver import solve_routes, format_label
+from src.domain.utils import availability_date
+from src.main import load_hotels_and_employees, format_workers_planning, print_final_solution
+
+WINDOW_DAYS = 7
+
+
+def plan_rolling_horizon(hotels, employees, window_days=WINDOW_DAYS, start=None):
+    """
+    Args:
+        hotels (list[Hotel]):
+        employees (list[Employee]): employees with their `availabilities` and `sector`
+        window_days (int): number of days planned by each solve
+        start (date): first day to plan, defaults to the first availability declared
+
+    Returns:
+        plans (list[dict]): for each window, its `start`, `end` (excluded) and planned `workers`
+    """
+    dates = [availability_date(a) for e in employees for a in e.availabilities]
+    if not dates:
+        return []
+    window_start = start or min(dates)
+    last_date = max(dates)
+
+    visited_hotels = set()
+    formed_couples = []
+    plans = []
+    while window_start <= last_date:
+        window_end = window_start + timedelta(days=window_days)
+        print('=========================================================')
+        print('Window {} - {}'.format(window_start.isoformat(), window_end.isoformat()))
+        print('=========================================================')
+
+        window_employees = _restrict_to_window(employees, window_start, window_end)
+        assignment = _carry_over_couples(window_employees, formed_couples)
+
+        coupled = {p for couple in assignment for p in couple}
+        # Employees without sector cannot be paired
+        free_employees = [e for e in window_employees if e.name not in coupled and e.sector]
+        if len(free_employees) > 1:
+            assignments = solve_couples(free_employees)
+            if assignments:
+                assignment.update(assignments[0])
+        formed = {frozenset(couple) for couple in formed_couples}
+        formed_couples += [couple for couple in assignment if frozenset(couple) not in formed]
+
+        workers = format_couples_with_positions(window_employees, assignment)
+        remaining_hotels = [h for h in hotels if format_label(h) not in visited_hotels]
+        itinerary = solve_routes(remaining_hotels, workers) if workers and remaining_hotels else None
+        if itinerary:
+            format_workers_planning(workers, itinerary)
+            visited_hotels.update(label for worker in workers for label in worker.routes)
+
+        plans.append({'start': window_start, 'end': window_end, 'workers': workers})
+        window_start = window_end
+
+    return plans
+
+
+def _restrict_to_window(employees, window_start, window_end):
+    window_employees = []
+    for employee in employees:
+        availabilities = [a for a in employee.availabilities
+                          if window_start <= availability_date(a) < window_end]
+        if availabilities:
+            window_employees.append(employee.replace(availabilities=availabilities))
+    return window_employees
+
+
+def _carry_over_couples(window_employees, formed_couples):
+    """
+    Keep the couples formed in the previous windows whose workers are still available together.
+    An employee is kept in the first of its couples only, the oldest one
+    """
+    employee_per_name = {e.name: e for e in window_employees}
+    assignment = {}
+    assigned = set()
+    for p1, p2 in formed_couples:
+        if p1 not in employee_per_name or p2 not in employee_per_name or p1 in assigned or p2 in assigned:
+            continue
+        e1, e2 = employee_per_name[p1], employee_per_name[p2]
+        dispos = [d for d in e1.availabilities if d in e2.availabilities]
+        sector = (e1.sector or 0) & (e2.sector or 0)
+        if dispos and sector:
+            assignment[(p1, p2)] = (dispos, sector)
+            assigned.update((p1, p2))
+    return assignment
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plan the visits one window at a time')
+    parser.add_argument('-w', '--window_days', help='number of days planned at once', type=int, default=WINDOW_DAYS)
+
+    args = parser.parse_args()
+
+    hotels, employees = load_hotels_and_employees()
+
+    for plan in plan_rolling_horizon(hotels, employees, args.window_days):
+        print('Window {} - {}'.format(plan['start'].isoformat(), plan['end'].isoformat()))
+        print_final_solution([w for w in plan['workers'] if w.routes is not None])
@@ -0,0 +1,221 @@
+"""
+ Offline address index, built from a Base Adresse Nationale (BAN) extract
+
+ The street names are normalized (case, accents, abbreviations) and indexed by trigrams,
+ the padding of the names favouring the matches on their prefix. The index is stored as
+ numpy arrays in a directory and memory-mapped when loaded, so resolving an address takes
+ a few array lookups and no network round-trip.
+
+ 1) Download a BAN extract, e.g. https://adresse.data.gouv.fr/data/ban/adresses/latest/csv/adresses-75.csv.gz
+ 2) Build the index once
+  ```
+  $  python src/services/address_index.py \
+      -s "/Users/fpaupier/projects/samu_social/data/adresses-75.csv" \
+      -o "/Users/fpaupier/projects/samu_social/data/ban-index"
+  ```
+ 3) Use it with `Map(address_index_path=...)`
+"""
+import argparse
+import csv
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+ALPHABET = ' 0123456789abcdefghijklmnopqrstuvwxyz'
+CHARACTER_CODES = {c: i for i, c in enumerate(ALPHABET)}
+TRIGRAMS_COUNT = len(ALPHABET) ** 3
+MIN_SCORE = 0.5  # Minimum trigram similarity between the queried and the indexed street names
+
+ABBREVIATIONS = {
+    'all': 'allee',
+    'av': 'avenue',
+    'bd': 'boulevard',
+    'bld': 'boulevard',
+    'bvd': 'boulevard',
+    'ch': 'chemin',
+    'crs': 'cours',
+    'fg': 'faubourg',
+    'fbg': 'faubourg',
+    'imp': 'impasse',
+    'pl': 'place',
+    'pas': 'passage',
+    'qu': 'quai',
+    'r': 'rue',
+    'rte': 'route',
+    'sq': 'square',
+    'st': 'saint',
+    'ste': 'sainte',
+}
+
+ARRAYS = ['street_postcodes', 'street_names', 'street_names_offsets', 'street_addresses_offsets',
+          'address_numbers', 'address_latitudes', 'address_longitudes', 'trigrams_offsets', 'trigrams_streets']
+
+
+def normalize(text):
+    """
+    Args:
+        text (str): e.g. 'Bd de l'Hôpital'
+
+    Returns:
+        str: e.g. 'boulevard de l hopital'
+    """
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = re.sub('[^0-9a-z]+', ' ', text).split()
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+
+def trigrams(name):
+    """
+    Args:
+        name (str): normalized name
+
+    Returns:
+        np.array: the distinct trigram codes of the name
+    """
+    padded = '  {} '.format(name)
+    codes = [CHARACTER_CODES[c] for c in padded]
+    return np.unique([(codes[i] * len(ALPHABET) + codes[i + 1]) * len(ALPHABET) + codes[i + 2]
+                      for i in range(len(codes) - 2)])
+
+
+def split_address(address):
+    """
+    Args:
+        address (str): e.g. '12 bis rue de la Paix'
+
+    Returns:
+        number (int): None if the address has no number
+        street (str): normalized name of the street
+    """
+    street = normalize(address)
+    match = re.match(r'(\d+)\s*(?:bis|ter|quater|[a-d])?\s+(.*)', street)
+    if not match:
+        return None, street
+    return int(match.group(1)), match.group(2)
+
+
+class AddressIndex(object):
+    def __init__(self, arrays):
+        """
+        Args:
+            arrays (dict[str: np.array]): see ARRAYS, as built by `build` or loaded by `load`
+        """
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def build(cls, source):
+        """
+        Args:
+            source (str): path to a BAN csv extract
+
+        Returns:
+            AddressIndex
+        """
+        addresses_per_street = {}
+        with open(source, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter=';'):
+                if not row['lat'] or not row['lon']:
+                    continue
+                key = (normalize(row['nom_voie']), int(row['code_postal']))
+                number = int(row['numero']) if row['numero'].isdigit() else 0
+                addresses_per_street.setdefault(key, []).append((number, float(row['lat']), float(row['lon'])))
+
+        streets = sorted(addresses_per_street)
+        names = [name.encode('ascii') for name, _ in streets]
+        addresses = [sorted(addresses_per_street[street]) for street in streets]
+
+        postings = [[] for _ in range(TRIGRAMS_COUNT)]
+        for street_id, (name, _) in enumerate(streets):
+            for trigram in trigrams(name):
+                postings[trigram].append(street_id)
+
+        all_addresses = np.array([a for street_addresses in addresses for a in street_addresses]).reshape(-1, 3)
+        return cls({
+            'street_postcodes': np.array([postcode for _, postcode in streets], dtype=np.int32),
+            'street_names': np.frombuffer(b''.join(names), dtype=np.uint8),
+            'street_names_offsets': np.cumsum([0] + [len(n) for n in names]).astype(np.int64),
+            'street_addresses_offsets': np.cumsum([0] + [len(a) for a in addresses]).astype(np.int64),
+            'address_numbers': all_addresses[:, 0].astype(np.int32),
+            'address_latitudes': all_addresses[:, 1].astype(np.float64),
+            'address_longitudes': all_addresses[:, 2].astype(np.float64),
+            'trigrams_offsets': np.cumsum([0] + [len(p) for p in postings]).astype(np.int64),
+            'trigrams_streets': np.array([s for p in postings for s in p], dtype=np.int32),
+        })
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, '{}.npy'.format(name)), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map an index saved with `save`"""
+        return cls({name: np.load(os.path.join(directory, '{}.npy'.format(name)), mmap_mode='r')
+                    for name in ARRAYS})
+
+    def find_street(self, street, postcode=None):
+        """
+        Args:
+            street (str): normalized name of the street
+            postcode (int):
+
+        Returns:
+            street_id (int): the most similar street, None if none is similar enough
+        """
+        query_trigrams = trigrams(street)
+        candidates = np.concatenate([self.trigrams_streets[self.trigrams_offsets[t]:self.trigrams_offsets[t + 1]]
+                                     for t in query_trigrams])
+        if postcode is not None:
+            candidates = candidates[self.street_postcodes[candidates] == postcode]
+        if not len(candidates):
+            return None
+
+        street_ids, shared_trigrams = np.unique(candidates, return_counts=True)
+        # Jaccard similarity, a name of n characters having (at most) n + 1 distinct trigrams
+        names_lengths = self.street_names_offsets[street_ids + 1] - self.street_names_offsets[street_ids]
+        scores = shared_trigrams / (len(query_trigrams) + names_lengths + 1 - shared_trigrams)
+        best = np.argmax(scores)
+        if scores[best] < MIN_SCORE:
+            return None
+        return int(street_ids[best])
+
+    def point(self, location):
+        """
+        Args:
+            location (dict): with the `address` and `postcode`
+
+        Returns:
+            point (dict): `latitude` and `longitude` of the address, None if the address is not found
+        """
+        number, street = split_address(location.get('address'))
+        if not street:
+            return None
+        try:
+            postcode = int(location.get('postcode'))
+        except (TypeError, ValueError):
+            postcode = None
+        street_id = self.find_street(street, postcode)
+        if street_id is None:
+            return None
+
+        start, end = self.street_addresses_offsets[street_id], self.street_addresses_offsets[street_id + 1]
+        numbers = self.address_numbers[start:end]
+        # The exact number if it exists, the closest one otherwise
+        i = start + (int(np.argmin(np.abs(numbers - number))) if number is not None else 0)
+        return {'latitude': float(self.address_latitudes[i]), 'longitude': float(self.address_longitudes[i])}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the offline address index from a BAN extract')
+    parser.add_argument('-s', '--source', help='path to the BAN csv extract', type=str)
+    parser.add_argument('-o', '--output', help='directory where to save the index', type=str)
+
+    args = parser.parse_args()
+
+    index = AddressIndex.build(args.source)
+    index.save(args.output)
+
+    print('{} streets and {} addresses indexed'.format(len(index.street_postcodes), len(index.address_numbers)))
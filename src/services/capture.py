@@ -0,0 +1,127 @@
+"""
+Capture the inputs of the solvers, to replay the slow plans offline with `src/replay.py`.
+
+When the environment variable SAMU_CAPTURE_DIR is set, each couple model and each routing model
+solved is saved in this directory, exactly as the solver received it:
+ - couples: the persons, their availabilities and sectors, as json
+ - routing: the distance matrix, the start and end locations, the demands and capacities, the drop penalty,
+   and the nearest neighbours and maximum distance of a sparse routing, as npz
+The employees names and the addresses are replaced by anonymous identifiers.
+    ```
+    $ SAMU_CAPTURE_DIR=data/captures python src/main.py
+    ```
+"""
+import itertools
+import json
+import os
+import time
+
+CAPTURE_DIRECTORY_VARIABLE = 'SAMU_CAPTURE_DIR'
+COUPLES_STAGE = 'couples'
+ROUTING_STAGE = 'routing'
+ROUTING_ARRAYS = ['distances', 'start_locations', 'end_locations', 'demands', 'vehicle_capacities']
+
+_captures_count = itertools.count()
+
+
+def capture_directory():
+    """Directory where the inputs are captured, None when the capture is disabled"""
+    return os.environ.get(CAPTURE_DIRECTORY_VARIABLE) or None
+
+
+def capture_couples(persons, dispos_per_person, sector_per_person):
+    """
+    Save the inputs of the couple model, if the capture is enabled
+
+    Args:
+        persons (list[str]):
+        dispos_per_person (dict[str: list[int]):
+        sector_per_person (dict[str: int]):
+
+    Returns:
+        path (str): None if the capture is disabled
+    """
+    directory = capture_directory()
+    if not directory:
+        return None
+
+    anonymous = {person: 'person_{}'.format(i) for i, person in enumerate(persons)}
+    path = _capture_path(directory, COUPLES_STAGE, 'json')
+    with open(path, 'w') as f:
+        json.dump({
+            'persons': [anonymous[p] for p in persons],
+            'dispos_per_person': {anonymous[p]: list(dispos_per_person[p]) for p in persons},
+            'sector_per_person': {anonymous[p]: sector_per_person[p] for p in persons},
+        }, f)
+    print('Couple model captured in {}'.format(path))
+    return path
+
+
+def load_couples(path):
+    """
+    Returns:
+        persons (list[str]), dispos_per_person (dict[str: list[int]), sector_per_person (dict[str: int])
+    """
+    with open(path, 'r') as f:
+        captured = json.load(f)
+    return captured['persons'], captured['dispos_per_person'], captured['sector_per_person']
+
+
+def capture_routing(data):
+    """
+    Save the routing data model, if the capture is enabled
+
+    Args:
+        data (dict): as built by `create_data_model`
+
+    Returns:
+        path (str): None if the capture is disabled
+    """
+    directory = capture_directory()
+    if not directory:
+        return None
+
+    import numpy as np
+
+    arrays = {name: np.asarray(data[name]) for name in ROUTING_ARRAYS}
+    if data.get('neighbours') is not None:
+        arrays['neighbours'] = np.asarray(data['neighbours'])
+
+    path = _capture_path(directory, ROUTING_STAGE, 'npz')
+    np.savez(path,
+             num_vehicles=data['num_vehicles'],
+             drop_penalty=data.get('drop_penalty') or 0,
+             max_distance=data.get('max_distance') or 0,
+             **arrays)
+    print('Routing model captured in {}'.format(path))
+    return path
+
+
+def load_routing(path):
+    """
+    Returns:
+        data (dict): routing data model, as built by `create_data_model`, with anonymous labels
+    """
+    import numpy as np
+
+    with np.load(path) as captured:
+        data = {name: captured[name] for name in ROUTING_ARRAYS}
+        num_vehicles = int(captured['num_vehicles'])
+        drop_penalty = int(captured['drop_penalty']) or None
+        max_distance = int(captured['max_distance']) if 'max_distance' in captured.files else 0
+        neighbours = captured['neighbours'] if 'neighbours' in captured.files else None
+    for name in ['start_locations', 'end_locations', 'demands', 'vehicle_capacities']:
+        data[name] = [int(value) for value in data[name]]
+    data['num_vehicles'] = num_vehicles
+    data['drop_penalty'] = drop_penalty
+    data['max_distance'] = max_distance or None
+    data['neighbours'] = neighbours
+    data['num_locations'] = len(data['distances'])
+    data['labels'] = ['location_{}'.format(i) for i in range(data['num_locations'])]
+    return data
+
+
+def _capture_path(directory, stage, extension):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, '{}-{}-{}-{}.{}'.format(
+        stage, time.strftime('%Y%m%d-%H%M%S'), os.getpid(), next(_captures_count), extension))
@@ -11,12 +11,17 @@
       -s "/Users/fpaupier/projects/samu_social/data/hotels-generalites.csv"
   ```
  3) A json file with the list of addresses is generated.
+
+ The `CsvReader` builds the `Employee` and `Hotel` entities directly from the rows.
 """
 
 import csv
+import io
 import argparse
 import json
 
+from src.domain.entities import Employee, Hotel, Point
+
 
 class CsvReader(object):
     def parse(self, source, csv_type):
@@ -27,34 +32,20 @@ class CsvReader(object):
             data = {i: j for i, j in enumerate(reader)}
             for i, line in data.items():
                 if csv_type == "people" and i > 0:
-                    formatted_address = '{} {} {} {}'.format(line[2], line[3], line[4], line[5])
-                    people = {
-                        'name': line[0],
-                        'surname': line[1],
-                        'address': ' '.join(formatted_address.split()),
-                        'postcode': line[6],
-                        'license': line[7],
-                        'availability': line[8],
-                        'time_of_day': line[9],
-                        'area1': line[10],
-                        'area2': line[11],
-                        'area3': line[12],
-                        'area4': line[13],
-                    }
-                    results.append(people)
+                    results.append(self.format_people(line))
                 if csv_type == "hotel" and i > 0:
                     if line[2] == "0":  # Only consider non removed hotel
                         formatted_address = "{} {}".format(line[7], line[9])
-                        hotel = {
-                            'hotel_status': line[2],
-                            'nom': line[6],
-                            'address': ' '.join(formatted_address.split()),
-                            'postcode': line[8],
-                            'capacity': line[41],
-                            'bedroom_number': line[43],
-                            'features': sum([int(line[i]) for i, line in enumerate(reader) if i in range(62, 150)]),
+                        hotel = Hotel(
+                            hotel_status=line[2],
+                            nom=line[6],
+                            address=' '.join(formatted_address.split()),
+                            postcode=line[8],
+                            capacity=line[41],
+                            bedroom_number=line[43],
+                            features=sum([int(line[i]) for i, line in enumerate(reader) if i in range(62, 150)]),
                             ### Should not
-                        }
+                        )
                         results.append(hotel)
 
         return results
@@ -67,37 +58,92 @@ class CsvReader(object):
             data = {i: j for i, j in enumerate(reader)}
             for i, line in data.items():
                 if csv_type == 'people' and i > 0:
-                    point = {'latitude': float(line[6]), 'longitude': float(line[8])} if (line[6] and line[8]) else None
-                    people = {
-                        'address': line[0],
-                        'area1': line[1],
-                        'area2': line[2],
-                        'area3': line[3],
-                        'area4': line[4],
-                        'availability': line[5],
-                        'license': line[7],
-                        'name': line[9],
-                        'point': point,
-                        'postcode': line[11],
-                        'surname': line[12],
-                        'time_of_day': line[13],
-                    }
-                    results.append(people)
+                    results.append(self.format_enriched_people(line))
                 if csv_type == 'hotel' and i > 0:
-                    point = {'latitude': float(line[5]), 'longitude': float(line[6])} if (line[5] and line[6]) else None
-                    hotel = {
-                        'address': line[0],
-                        'bedroom_number': line[1],
-                        'capacity': line[2],
-                        'features': line[3],
-                        'hotel_status': line[4],
-                        'nom': line[7],
-                        'point': point,
-                        'postcode': line[9],
-                    }
+                    point = (Point(latitude=float(line[5]), longitude=float(line[6]))
+                             if (line[5] and line[6]) else None)
+                    hotel = Hotel(
+                        address=line[0],
+                        bedroom_number=line[1],
+                        capacity=line[2],
+                        features=line[3],
+                        hotel_status=line[4],
+                        nom=line[7],
+                        point=point,
+                        postcode=line[9],
+                    )
                     results.append(hotel)
         return results
 
+    def parse_appended(self, source, offset=0, enriched=False):
+        """
+        Parse only the people rows appended to `source` after the byte `offset`.
+
+        Only complete lines (terminated by a new line) are consumed, so a row
+        being written while we read is picked up by the next call.
+
+        Args:
+            source (str): path to the employee csv file
+            offset (int): byte offset returned by the previous call, 0 to read from the start
+            enriched (bool): whether the file follows the enriched (geocoded) layout
+
+        Returns:
+            results (list[Employee]): the people rows found after the offset
+            offset (int): byte offset of the end of the last consumed line
+        """
+        with open(source, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+
+        consumed = chunk.rfind(b'\n') + 1
+        if not consumed:
+            return [], offset
+
+        lines = io.StringIO(chunk[:consumed].decode('utf-8-sig' if offset == 0 else 'utf-8'))
+        format_line = self.format_enriched_people if enriched else self.format_people
+        results = []
+        for i, line in enumerate(csv.reader(lines, delimiter=';')):
+            if (offset == 0 and i == 0) or not line:  # Header, or blank line
+                continue
+            results.append(format_line(line))
+
+        return results, offset + consumed
+
+    @staticmethod
+    def format_people(line):
+        formatted_address = '{} {} {} {}'.format(line[2], line[3], line[4], line[5])
+        return Employee(
+            name=line[0],
+            surname=line[1],
+            address=' '.join(formatted_address.split()),
+            postcode=line[6],
+            license=line[7],
+            availability=line[8],
+            time_of_day=line[9],
+            area1=line[10],
+            area2=line[11],
+            area3=line[12],
+            area4=line[13],
+        )
+
+    @staticmethod
+    def format_enriched_people(line):
+        point = Point(latitude=float(line[6]), longitude=float(line[8])) if (line[6] and line[8]) else None
+        return Employee(
+            address=line[0],
+            area1=line[1],
+            area2=line[2],
+            area3=line[3],
+            area4=line[4],
+            availability=line[5],
+            license=line[7],
+            name=line[9],
+            point=point,
+            postcode=line[11],
+            surname=line[12],
+            time_of_day=line[13],
+        )
+
 
 def parse_csv(source, csv_type, write=False):
     """
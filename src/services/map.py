@@ -4,9 +4,18 @@ import requests
 
 
 class Map(object):
-    def __init__(self):
+    def __init__(self, address_index_path=None):
+        """
+        Args:
+            address_index_path (str): directory of an offline address index, see `AddressIndex`.
+                Addresses are first looked up in the index, then with the API if not found
+        """
         self.url = 'https://api-adresse.data.gouv.fr/search/'
         self.radius = 6371  # km
+        self.address_index = None
+        if address_index_path:
+            from src.services.address_index import AddressIndex
+            self.address_index = AddressIndex.load(address_index_path)
 
     def distance(self, departure, arrival):
         try:
@@ -29,6 +38,10 @@ class Map(object):
         #       address
         if not location.get('address'):
             return None
+        if self.address_index is not None:
+            point = self.address_index.point(location)
+            if point:
+                return point
         geographic_information = self.get(location)
         geographic_information_features = geographic_information['features']
         if not geographic_information_features:
@@ -0,0 +1,111 @@
+"""
+Plans kept in memory by the web application, and their rendered pages.
+
+A plan is stored once under a random ID, then browsed page by page, filtered by sector and date.
+Each page is rendered once: its html is kept precompressed with gzip along with its ETag, so
+browsing a large plan only costs the rendering of the pages viewed, and revisiting them nothing.
+"""
+import gzip
+import hashlib
+import math
+import threading
+import uuid
+from collections import OrderedDict
+
+PLANS_LIMIT = 20  # Number of plans kept, the least recently viewed ones are dropped
+PAGES_LIMIT = 500  # Number of rendered pages kept, all plans included
+PAGE_SIZE = 50  # Number of couples per page
+
+
+class PlanCache(object):
+    def __init__(self, plans_limit=PLANS_LIMIT, pages_limit=PAGES_LIMIT):
+        self.plans_limit = plans_limit
+        self.pages_limit = pages_limit
+        self.plans = OrderedDict()
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, planning):
+        """
+        Args:
+            planning (list[dict]): the workers of the plan, as dicts
+
+        Returns:
+            plan_id (str)
+        """
+        plan_id = uuid.uuid4().hex
+        with self.lock:
+            self.plans[plan_id] = planning
+            while len(self.plans) > self.plans_limit:
+                dropped_id, _ = self.plans.popitem(last=False)
+                for key in [k for k in self.pages if k[0] == dropped_id]:
+                    del self.pages[key]
+        return plan_id
+
+    def get(self, plan_id):
+        """
+        Returns:
+            planning (list[dict]): None if the plan is unknown or was dropped
+        """
+        with self.lock:
+            if plan_id not in self.plans:
+                return None
+            self.plans.move_to_end(plan_id)
+            return self.plans[plan_id]
+
+    def rendered(self, key, render):
+        """
+        Args:
+            key (tuple): the plan ID, then the parameters of the page
+            render (callable): renders the html of the page, only called if it is not cached
+
+        Returns:
+            html (bytes),
+            compressed (bytes): the html compressed with gzip
+            etag (str)
+        """
+        with self.lock:
+            if key in self.pages:
+                self.pages.move_to_end(key)
+                return self.pages[key]
+
+        # Rendered outside the lock, a page rendered twice at the same time is only cached once
+        html = render().encode('utf-8')
+        page = html, gzip.compress(html), hashlib.sha1(html).hexdigest()
+        with self.lock:
+            if key[0] in self.plans:
+                self.pages[key] = page
+                while len(self.pages) > self.pages_limit:
+                    self.pages.popitem(last=False)
+        return page
+
+
+def paginate(planning, sector=None, date=None, page=1, page_size=PAGE_SIZE):
+    """
+    Args:
+        planning (list[dict]): the workers of the plan, as dicts
+        sector (int): only keep the workers of this sector
+        date (str): only keep the workers visiting hotels on this date (isoformat), with these visits only
+        page (int): starting from 1
+        page_size (int): number of workers per page
+
+    Returns:
+        dict: the `data` of the page, the `page` and `pages_count`, and the `sectors` and `dates` of the plan
+    """
+    rows = [worker for worker in planning if sector is None or worker['sector'] == sector]
+    if date:
+        rows = [dict(worker, visits=[visit for visit in worker['visits'] or [] if visit['date'] == date])
+                for worker in rows]
+        rows = [worker for worker in rows if worker['visits']]
+
+    pages_count = max(int(math.ceil(len(rows) / float(page_size))), 1)
+    page = min(max(page, 1), pages_count)
+    return {
+        'data': rows[(page - 1) * page_size:page * page_size],
+        'page': page,
+        'pages_count': pages_count,
+        'sector': sector,
+        'date': date,
+        'sectors': sorted({worker['sector'] for worker in planning if worker['sector'] is not None}),
+        'dates': sorted({visit['date'] for worker in planning for visit in worker['visits'] or []}),
+    }
@@ -0,0 +1,128 @@
+"""
+ Incremental ingestion of the employee file
+
+ Employees keep declaring availabilities, which are appended to the employee csv file.
+ Instead of re-parsing and re-grouping the whole file for every plan, the `RosterIndex`
+ remembers the byte offset of the last ingestion and only parses the rows appended since,
+ merging their availabilities into a roster persisted as json.
+
+ ```
+ $  python src/services/roster_index.py \
+     -s "/Users/fpaupier/projects/samu_social/data/fichier-salarie.csv" \
+     -i "/Users/fpaupier/projects/samu_social/data/roster-index.json"
+ ```
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from src.domain.availability_model import merge_employee
+from src.domain.entities import Employee
+from src.services.csv_reader import CsvReader
+
+INDEX_VERSION = 2  # Version of the persisted index, an index of another version is rebuilt from the file
+FINGERPRINT_SIZE = 256  # Number of bytes, at the start of the file and before the offset, used to detect a rewrite
+
+
+class RosterIndex(object):
+    def __init__(self, path):
+        """
+        Args:
+            path (str): path of the json file where the roster is persisted
+        """
+        self.path = path
+        self.csv_reader = CsvReader()
+        self.source = None
+        self.offset = 0
+        self.fingerprint = ''
+        self.employees = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        # The availabilities of the first indexes were not zero-padded
+        if index.get('version') != INDEX_VERSION:
+            return
+        self.source = index['source']
+        self.offset = index['offset']
+        self.fingerprint = index['fingerprint']
+        self.employees = {key: Employee.from_record(e) for key, e in index['employees'].items()}
+
+    def save(self):
+        index = {
+            'version': INDEX_VERSION,
+            'source': self.source,
+            'offset': self.offset,
+            'fingerprint': self.fingerprint,
+            'employees': {key: e.as_dict() for key, e in self.employees.items()},
+        }
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def reset(self, source):
+        self.source = os.path.abspath(source)
+        self.offset = 0
+        self.fingerprint = ''
+        self.employees = {}
+
+    def ingest(self, source, enriched=False):
+        """
+        Merge the rows appended to `source` since the last ingestion into the roster
+
+        The whole file is re-ingested when it is not the one the index was built from,
+        or when it has been truncated or rewritten since: its start and the bytes just before
+        the offset must be unchanged.
+
+        Args:
+            source (str): path to the employee csv file
+            enriched (bool): whether the file follows the enriched (geocoded) layout
+
+        Returns:
+            employees (list[Employee]): the whole roster, each employee with its `availabilities`
+        """
+        if (self.source != os.path.abspath(source)
+                or os.path.getsize(source) < self.offset
+                or _read_fingerprint(source, self.offset) != self.fingerprint):
+            self.reset(source)
+
+        rows, self.offset = self.csv_reader.parse_appended(source, self.offset, enriched)
+        self.fingerprint = _read_fingerprint(source, self.offset)
+
+        for row in rows:
+            self.merge(row)
+        if rows or not os.path.exists(self.path):
+            self.save()
+
+        return list(self.employees.values())
+
+    def merge(self, employee):
+        merge_employee(self.employees, employee)
+
+
+def _read_fingerprint(source, offset):
+    """Hash of the first bytes of the file and of the bytes just before `offset`"""
+    fingerprint = hashlib.sha1()
+    with open(source, 'rb') as f:
+        fingerprint.update(f.read(min(offset, FINGERPRINT_SIZE)))
+        f.seek(max(offset - FINGERPRINT_SIZE, 0))
+        fingerprint.update(f.read(min(offset, FINGERPRINT_SIZE)))
+    return fingerprint.hexdigest()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest the rows appended to the employee file')
+    parser.add_argument('-s', '--source', help='path to the employee csv file', type=str)
+    parser.add_argument('-i', '--index', help='path to the persisted roster index', type=str)
+    parser.add_argument('--enriched', help='the file follows the enriched layout', action='store_true')
+
+    args = parser.parse_args()
+
+    roster = RosterIndex(args.index).ingest(args.source, enriched=args.enriched)
+
+    print('{} employees in the roster'.format(len(roster)))
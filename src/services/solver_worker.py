@@ -0,0 +1,118 @@
+"""
+Solver process started ahead of the first plan.
+
+Importing OR-Tools and NumPy and running a first search take a noticeable time. The worker
+process pays these costs at startup, while no plan is waiting, and then runs the plans sent
+by the web application.
+"""
+import atexit
+import queue
+import time
+import traceback
+from multiprocessing import Lock, Process, Queue
+
+from src.services import telemetry
+
+POLL_SECONDS = 1  # Interval at which the worker process is checked while waiting for a plan
+
+
+class SolverWorker(object):
+    def __init__(self, timeout=None, target=None):
+        """
+        Args:
+            timeout (float): seconds after which a plan is abandoned and the worker restarted,
+                the plans are not bounded if not given
+            target (callable): function run by the worker process, with the requests and responses queues
+        """
+        self.timeout = timeout
+        self.target = target or _serve
+        self.lock = Lock()
+        self.process = None
+        atexit.register(self.stop)
+
+    def start(self):
+        self.requests = Queue()
+        self.responses = Queue()
+        # Not daemonic, so that the plans can still use the parallel solvers
+        self.process = Process(target=self.target, args=(self.requests, self.responses), daemon=False)
+        self.process.start()
+        return self
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join()
+
+    def restart(self):
+        """Kill the worker process and start a new one, with new queues as the old ones may be corrupted"""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        return self.start()
+
+    def plan(self, **parameters):
+        """
+        Run `main` in the worker process
+
+        Args:
+            parameters: keyword arguments of `main`
+
+        Returns:
+            workers (list[Worker])
+        """
+        with self.lock:
+            self.requests.put(parameters)
+            status, result, records = self._wait_response()
+        telemetry.extend(records)
+        if status == 'error':
+            raise RuntimeError('Planning failed in the solver worker:\n{}'.format(result))
+        return result
+
+    def _wait_response(self):
+        deadline = time.time() + self.timeout if self.timeout else None
+        while True:
+            try:
+                return self.responses.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    self.restart()
+                    raise RuntimeError('The solver worker died while planning, it has been restarted')
+                if deadline and time.time() > deadline:
+                    self.restart()
+                    raise RuntimeError('No plan after {}s, the solver worker has been restarted'.format(self.timeout))
+
+
+def warm_up():
+    """Import the solvers and run a tiny search with each of them"""
+    import numpy as np
+
+    from src.domain.model_couple import exploration
+    from src.domain.solver import create_search_parameters, solve_data_model
+
+    exploration(['A', 'B'], {'A': [20190212], 'B': [20190212]}, {'A': 1, 'B': 1})
+    solve_data_model({
+        'num_vehicles': 1,
+        'start_locations': [0],
+        'end_locations': [1],
+        'distances': np.array([[0, 0, 10], [0, 0, 10], [10, 10, 0]], dtype=np.int32),
+        'labels': ['start', 'end', 'hotel'],
+        'num_locations': 3,
+        'demands': [1, 1, 1],
+        'vehicle_capacities': [8],
+    }, create_search_parameters())
+
+
+def _serve(requests, responses):
+    from src.main import main
+
+    warm_up()
+    print('Solver worker ready')
+    telemetry.clear()
+    for parameters in iter(requests.get, None):
+        try:
+            response = ('success', main(**parameters))
+        except Exception:
+            response = ('error', traceback.format_exc())
+        # The telemetry of the plan is sent back with it, to be served by the web application
+        responses.put(response + (telemetry.records(),))
+        telemetry.clear()
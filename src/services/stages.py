@@ -0,0 +1,97 @@
+"""
+Run the stages of a pipeline concurrently, each as soon as the stages it depends on are done.
+
+A pipeline is a dict of stages by name, each a (function, dependencies) tuple: the function is
+called with the results of its dependencies, in their order. The stages run on threads, the
+solvers and NumPy releasing the GIL for most of their work.
+    ```
+    results, report = run_stages({
+        'hotels': (load_hotels, []),
+        'employees': (load_employees, []),
+        'couples': (solve_couples, ['employees']),
+        'routes': (solve_routes, ['hotels', 'couples']),
+    })
+    ```
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def run_stages(stages, max_workers=None):
+    """
+    Args:
+        stages (dict[str: tuple(callable, list[str])]): function and dependencies of each stage
+        max_workers (int): number of stages run at once, 1 runs them in sequence
+
+    Returns:
+        results (dict[str: object]): result of each stage
+        report (dict): `durations` of the stages, `wall_time` of the pipeline, `sequential_time` it would
+            have taken running the stages one after the other, and its `critical_path` with its time
+    """
+    unknown = {d for _, dependencies in stages.values() for d in dependencies if d not in stages}
+    if unknown:
+        raise ValueError('Unknown stages: {}'.format(', '.join(sorted(unknown))))
+
+    results = {}
+    durations = {}
+    pending = dict(stages)
+    running = {}
+    start = time.time()
+    with ThreadPoolExecutor(max_workers or len(stages) or 1) as executor:
+        while pending or running:
+            ready = [name for name, (_, dependencies) in pending.items() if all(d in results for d in dependencies)]
+            if not ready and not running:
+                raise ValueError('Cyclic dependencies between the stages: {}'.format(', '.join(sorted(pending))))
+            for name in ready:
+                function, dependencies = pending.pop(name)
+                running[executor.submit(_timed, function, [results[d] for d in dependencies])] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                # The exception of a failed stage is raised here, the other stages are not started
+                results[name], durations[name] = future.result()
+
+    critical_path, critical_path_time = _critical_path(stages, durations)
+    return results, {
+        'durations': durations,
+        'wall_time': time.time() - start,
+        'sequential_time': sum(durations.values()),
+        'critical_path': critical_path,
+        'critical_path_time': critical_path_time,
+    }
+
+
+def print_report(report):
+    for name, duration in sorted(report['durations'].items(), key=lambda item: -item[1]):
+        print('{}: {:.2f}s'.format(name, duration))
+    print('Pipeline: {:.2f}s, critical path {} {:.2f}s, {:.2f}s if run sequentially'.format(
+        report['wall_time'], ' > '.join(report['critical_path']), report['critical_path_time'],
+        report['sequential_time']))
+
+
+def _timed(function, arguments):
+    start = time.time()
+    result = function(*arguments)
+    return result, time.time() - start
+
+
+def _critical_path(stages, durations):
+    """Longest chain of dependent stages, by duration"""
+    finish = {}
+    previous = {}
+
+    def finish_time(name):
+        if name not in finish:
+            dependencies = stages[name][1]
+            previous[name] = max(dependencies, key=finish_time) if dependencies else None
+            finish[name] = durations[name] + (finish_time(previous[name]) if previous[name] else 0)
+        return finish[name]
+
+    if not stages:
+        return [], 0
+    last = max(stages, key=finish_time)
+    path = [last]
+    while previous[path[-1]]:
+        path.append(previous[path[-1]])
+    return path[::-1], finish[last]
@@ -0,0 +1,127 @@
+"""
+In-process telemetry of the solver searches.
+
+Each search (couple exploration, couple satisfaction, routing) opens a record with the size of
+its model, adds the solutions found along the search with their time and objective, and closes
+it with its final status, objective, bound, gap and the solver statistics. The last records are
+kept in memory and served by the web application, to find out which rosters make the solvers slow.
+
+The records are kept per process: the searches run in a `multiprocessing.Pool` are wrapped with
+`collected` and their records merged back with `merged`, those of the `SolverWorker` are sent back
+with its plans.
+    ```
+    results = telemetry.merged(pool.starmap(telemetry.collected, [(solve, hotels, workers), ...]))
+    ```
+"""
+import threading
+import time
+from collections import deque
+
+RECORDS_LIMIT = 200  # Number of records kept in memory, the oldest ones are dropped
+
+_records = deque(maxlen=RECORDS_LIMIT)
+_lock = threading.Lock()
+
+
+def start(search, **model_size):
+    """
+    Args:
+        search (str): name of the search, e.g. 'couples_exploration'
+        model_size: number of variables, constraints, locations... of the model
+
+    Returns:
+        record (dict): to complete with `add_solution` and `finish`
+    """
+    return {
+        'search': search,
+        'model': model_size,
+        'started_at': time.time(),
+        'wall_time': None,
+        'solutions': [],
+        'status': None,
+        'objective': None,
+        'bound': None,
+        'gap': None,
+        'statistics': {},
+    }
+
+
+def add_solution(record, objective):
+    """Save the time since the start of the search and the objective of a new solution"""
+    record['solutions'].append({'time': time.time() - record['started_at'], 'objective': objective})
+
+
+def finish(record, status, objective=None, bound=None, **statistics):
+    """
+    Close the record and keep it in memory
+
+    Args:
+        record (dict): as returned by `start`
+        status (str): see SolverStatus
+        objective (int): objective of the best solution found
+        bound (int): best bound proven on the objective
+        statistics: e.g. number of branches and conflicts of the search
+
+    Returns:
+        record (dict)
+    """
+    record['wall_time'] = time.time() - record['started_at']
+    record['status'] = status
+    record['objective'] = objective
+    record['bound'] = bound
+    if objective is not None and bound is not None:
+        record['gap'] = abs(bound - objective) / max(abs(objective), 1)
+    record['statistics'] = statistics
+    extend([record])
+    return record
+
+
+def extend(records):
+    """Keep records built in another process"""
+    with _lock:
+        _records.extend(records)
+
+
+def collected(function, *arguments):
+    """
+    Run a function in a pool process, keeping the records of its searches only
+
+    Returns:
+        result: of the function
+        records (list[dict]): of the searches run by the function, to merge in the parent process
+    """
+    clear()
+    result = function(*arguments)
+    return result, records()
+
+
+def merged(results):
+    """
+    Keep the records of the functions run with `collected`
+
+    Args:
+        results (list[tuple]): as returned by `collected`
+
+    Returns:
+        list: the results of the functions
+    """
+    for _, function_records in results:
+        extend(function_records)
+    return [result for result, _ in results]
+
+
+def records(search=None):
+    """
+    Args:
+        search (str): only return the records of this search
+
+    Returns:
+        list[dict]: the records kept, oldest first
+    """
+    with _lock:
+        return [r for r in _records if search is None or r['search'] == search]
+
+
+def clear():
+    with _lock:
+        _records.clear()
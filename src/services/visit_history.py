@@ -0,0 +1,52 @@
+"""
+ Date of the last visit of each hotel, persisted as json between the plans
+
+ The hotels pre-selection favours the hotels not visited for a long time. Each plan made with
+ the pre-selection records the date of the visits it plans, by hotel label.
+"""
+import json
+import os
+from datetime import date
+
+from src.domain.utils import availability_date
+
+
+def load_last_visits(path):
+    """
+    Args:
+        path (str): json file of the last visits, it may not exist yet
+
+    Returns:
+        dict[str: date]: date of the last visit of each hotel, by label
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {label: date(*map(int, day.split('-'))) for label, day in json.load(f).items()}
+
+
+def record_visits(path, workers):
+    """
+    Record the visits planned for the workers, a couple visiting its hotels on its first availability
+
+    Args:
+        path (str): json file of the last visits
+        workers (list[Worker]): with their `routes` and `availabilities`
+
+    Returns:
+        dict[str: date]: the last visits, updated
+    """
+    last_visits = load_last_visits(path)
+    for worker in workers:
+        if not worker.routes or not worker.availabilities:
+            continue
+        day = min(availability_date(a) for a in worker.availabilities)
+        for label in worker.routes:
+            if label not in last_visits or last_visits[label] < day:
+                last_visits[label] = day
+
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({label: day.isoformat() for label, day in last_visits.items()}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return last_visits
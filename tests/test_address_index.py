@@ -0,0 +1,58 @@
+import timeit
+
+from src.services.address_index import AddressIndex, normalize, split_address
+from src.services.map import Map
+
+BAN_HEADER = 'id;id_fantoir;numero;rep;nom_voie;code_postal;code_insee;nom_commune;lon;lat\n'
+BAN_ROWS = [
+    ('1', "Rue de l'Hôpital Saint-Louis", '75010', '2.3661', '48.8731'),
+    ('3', "Rue de l'Hôpital Saint-Louis", '75010', '2.3664', '48.8732'),
+    ('12', 'Boulevard Saint-Michel', '75005', '2.3420', '48.8490'),
+    ('14', 'Boulevard Saint-Michel', '75006', '2.3418', '48.8481'),
+    ('5', 'Avenue Winston Churchill', '75008', '2.3130', '48.8660'),
+]
+
+
+def _index(tmpdir):
+    source = tmpdir.join('adresses-75.csv')
+    source.write(BAN_HEADER + ''.join('id;fantoir;{};;{};{};75100;Paris;{};{}\n'.format(*row) for row in BAN_ROWS))
+    AddressIndex.build(str(source)).save(str(tmpdir.join('ban-index')))
+    return str(tmpdir.join('ban-index'))
+
+
+def test_normalize_and_split_address():
+    assert normalize("Bd de l'Hôpital") == 'boulevard de l hopital'
+    assert split_address('12 bis Av. Winston Churchill') == (12, 'avenue winston churchill')
+    assert split_address('Rue Gay Lussac') == (None, 'rue gay lussac')
+
+
+def test_point_from_offline_index(tmpdir):
+    index = AddressIndex.load(_index(tmpdir))
+
+    assert index.point({'address': "3 rue de l'hopital st louis", 'postcode': '75010'}) == \
+        {'latitude': 48.8732, 'longitude': 2.3664}
+    # Closest number of the street within the postcode
+    assert index.point({'address': '13 bd St Michel', 'postcode': 75006}) == {'latitude': 48.8481, 'longitude': 2.3418}
+    assert index.point({'address': '5 avenue winston churchill', 'postcode': 75010}) is None
+    assert index.point({'address': '5 rue de rivoli', 'postcode': 75008}) is None
+
+    elapsed = min(timeit.repeat(lambda: index.point({'address': '12 bd saint michel', 'postcode': 75005}),
+                                number=100, repeat=3)) / 100
+    print('Offline lookup in {:.1f}us'.format(elapsed * 1e6))
+
+
+def test_map_falls_back_to_the_api(tmpdir, monkeypatch):
+    map = Map(address_index_path=_index(tmpdir))
+    queried = []
+
+    def get(parameters):
+        queried.append(parameters)
+        return {'features': []}
+
+    monkeypatch.setattr(map, 'get', get)
+
+    assert map.point({'address': '1 rue de l hopital saint louis', 'postcode': 75010}) == \
+        {'latitude': 48.8731, 'longitude': 2.3661}
+    assert not queried
+    assert map.point({'address': '5 rue de rivoli', 'postcode': 75001}) is None
+    assert len(queried) == 1
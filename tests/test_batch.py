@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from src import batch
+from src.batch import read_scenarios, run_scenarios
+
+
+def test_read_scenarios_from_directory(tmpdir):
+    for name in ['february', 'march']:
+        scenario = tmpdir.mkdir(name)
+        scenario.join('hotels.csv').write('')
+        scenario.join('employees.csv').write('')
+    tmpdir.join('march', 'parameters.json').write(json.dumps({'per_sector': True}))
+    tmpdir.mkdir('not-a-scenario')
+
+    scenarios = read_scenarios(str(tmpdir))
+
+    assert [s['name'] for s in scenarios] == ['february', 'march']
+    assert scenarios[0]['parameters'] == {}
+    assert scenarios[1]['parameters'] == {'per_sector': True}
+    assert scenarios[1]['employees'] == str(tmpdir.join('march', 'employees.csv'))
+
+
+def test_read_scenarios_from_manifest(tmpdir):
+    manifest = tmpdir.join('manifest.json')
+    manifest.write(json.dumps([{'hotels': 'a/hotels.csv', 'employees': 'a/employees.csv', 'parameters': {'top_k': 3}}]))
+
+    scenarios = read_scenarios(str(manifest))
+
+    assert scenarios == [{'name': 'scenario-0',
+                          'hotels': str(tmpdir.join('a', 'hotels.csv')),
+                          'employees': str(tmpdir.join('a', 'employees.csv')),
+                          'parameters': {'top_k': 3}}]
+
+
+def test_read_scenarios_rejects_duplicate_names(tmpdir):
+    manifest = tmpdir.join('manifest.json')
+    manifest.write(json.dumps([{'name': 'february', 'hotels': 'a/hotels.csv', 'employees': 'a/employees.csv'},
+                               {'name': 'february', 'hotels': 'b/hotels.csv', 'employees': 'b/employees.csv'}]))
+
+    with pytest.raises(ValueError, match='february'):
+        read_scenarios(str(manifest))
+
+
+def _run_scenario(scenario, output_directory):
+    if scenario['name'] == 'crashing':
+        os._exit(1)
+    with open(os.path.join(output_directory, '{}.json'.format(scenario['name'])), 'w') as f:
+        json.dump({'status': 'success', 'seconds': 1.5}, f)
+
+
+def test_run_scenarios_does_not_report_stale_results(tmpdir, monkeypatch):
+    monkeypatch.setattr(batch, 'run_scenario', _run_scenario)
+    scenarios = [{'name': name, 'hotels': '', 'employees': '', 'parameters': {}} for name in ['working', 'crashing']]
+    # Outputs of a previous run, when the crashing scenario was still working
+    for scenario in scenarios:
+        tmpdir.join('{}.json'.format(scenario['name'])).write(json.dumps({'status': 'success', 'seconds': 2}))
+        tmpdir.join('{}.log'.format(scenario['name'])).write('previous run')
+
+    summary = run_scenarios(scenarios, str(tmpdir), processes=2)
+
+    assert summary['scenarios'] == [{'name': 'working', 'status': 'success', 'seconds': 1.5},
+                                    {'name': 'crashing', 'status': 'crashed', 'seconds': None}]
+    assert summary['sequential_time_seconds'] == 1.5
+    assert not tmpdir.join('crashing.log').exists()
+    assert json.loads(tmpdir.join('summary.json').read()) == summary
+
+
+def test_each_scenario_has_its_own_roster_index(tmpdir, monkeypatch):
+    import src.main
+
+    calls = []
+    monkeypatch.setattr(src.main, 'main', lambda **parameters: calls.append(parameters) or [])
+    for name in ['february', 'march']:
+        batch.run_scenario({'name': name, 'hotels': 'hotels.csv', 'employees': 'employees.csv',
+                            'parameters': {'incremental': True}}, str(tmpdir))
+
+    assert [call['roster_index_file'] for call in calls] == [str(tmpdir.join('february-roster-index.json')),
+                                                            str(tmpdir.join('march-roster-index.json'))]
+    assert calls[0]['last_visits_file'] == str(tmpdir.join('february-last-visits.json'))
+    assert json.loads(tmpdir.join('march.json').read())['parameters'] == {'incremental': True}
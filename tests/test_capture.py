@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+
+from src.services import capture
+
+
+def test_nothing_is_captured_by_default(monkeypatch):
+    monkeypatch.delenv(capture.CAPTURE_DIRECTORY_VARIABLE, raising=False)
+    assert capture.capture_couples(['Em'], {'Em': [20190212]}, {'Em': 1}) is None
+
+
+def test_couples_are_captured_anonymized(monkeypatch, tmpdir):
+    monkeypatch.setenv(capture.CAPTURE_DIRECTORY_VARIABLE, str(tmpdir))
+    path = capture.capture_couples(['Em', 'Pop'], {'Em': [20190212, 20190221], 'Pop': [20190212]},
+                                   {'Em': 1, 'Pop': 3})
+
+    with open(path) as f:
+        assert 'Em' not in json.dumps(json.load(f))
+    persons, dispos_per_person, sector_per_person = capture.load_couples(path)
+    assert persons == ['person_0', 'person_1']
+    assert dispos_per_person == {'person_0': [20190212, 20190221], 'person_1': [20190212]}
+    assert sector_per_person == {'person_0': 1, 'person_1': 3}
+
+
+def test_routing_data_model_is_replayable(monkeypatch, tmpdir):
+    monkeypatch.setenv(capture.CAPTURE_DIRECTORY_VARIABLE, str(tmpdir))
+    data = {
+        'num_vehicles': 1,
+        'start_locations': [0],
+        'end_locations': [1],
+        'distances': np.array([[0, 0, 10], [0, 0, 10], [10, 10, 0]], dtype=np.int32),
+        'labels': ['1 rue de Paris 75001', '1 rue de Paris 75001', '2 rue de Paris 75001'],
+        'num_locations': 3,
+        'demands': [1, 1, 1],
+        'vehicle_capacities': [8],
+        'drop_penalty': None,
+        'neighbours': None,
+        'max_distance': None,
+    }
+    replayed = capture.load_routing(capture.capture_routing(data))
+
+    assert (replayed.pop('distances') == data.pop('distances')).all()
+    assert replayed.pop('labels') == ['location_0', 'location_1', 'location_2']
+    data.pop('labels')
+    assert replayed == data
+
+
+def test_sparse_routing_is_replayed_sparse(monkeypatch, tmpdir):
+    monkeypatch.setenv(capture.CAPTURE_DIRECTORY_VARIABLE, str(tmpdir))
+    data = {
+        'num_vehicles': 1,
+        'start_locations': [0],
+        'end_locations': [1],
+        'distances': np.zeros((4, 4), dtype=np.int32),
+        'labels': ['depot', 'depot', 'hotel 1', 'hotel 2'],
+        'num_locations': 4,
+        'demands': [1, 1, 1, 1],
+        'vehicle_capacities': [8],
+        'drop_penalty': 1000000,
+        'neighbours': np.array([[2], [2], [3], [2]], dtype=np.int32),
+        'max_distance': 15000,
+    }
+    replayed = capture.load_routing(capture.capture_routing(data))
+
+    assert replayed['neighbours'].tolist() == [[2], [2], [3], [2]]
+    assert replayed['max_distance'] == 15000
+    assert replayed['drop_penalty'] == 1000000
@@ -0,0 +1,67 @@
+from src.domain.cluster_assignment import assign_clusters, cluster_hotels, solve_routes_by_cluster
+from src.domain.entities import Hotel, Point, Worker
+from src.domain.solver import HOTELS_PER_ROUTE, format_label
+
+
+def _hotel(i, latitude, longitude):
+    return Hotel(nom='Hotel {}'.format(i), address='{} rue de Paris'.format(i), postcode='75001',
+                 point=Point(latitude=latitude, longitude=longitude))
+
+
+def _worker(name, latitude, longitude):
+    return Worker(name=name, address='1 rue {}'.format(name), postcode='75004',
+                  point=Point(latitude=latitude, longitude=longitude))
+
+
+def test_clusters_respect_the_capacity():
+    hotels = [_hotel(i, 48.85 + 0.001 * i, 2.35) for i in range(10)]
+    clusters, centroids, unassigned = cluster_hotels(hotels, 3, capacity=3)
+
+    assert len(clusters) == 3 and centroids.shape == (3, 2)
+    assert all(len(cluster) <= 3 for cluster in clusters)
+    assert len(unassigned) == 1
+    assert sorted(h.nom for cluster in clusters + [unassigned] for h in cluster) == sorted(h.nom for h in hotels)
+
+
+def test_clusters_group_nearby_hotels():
+    paris = [_hotel(i, 48.8566 + 0.001 * i, 2.3522) for i in range(3)]
+    lyon = [_hotel(i, 45.7640 + 0.001 * i, 4.8357) for i in range(3, 6)]
+    clusters, _, unassigned = cluster_hotels(paris + lyon, 2)
+
+    assert not unassigned
+    assert sorted(sorted(h.nom for h in cluster) for cluster in clusters) == [
+        [h.nom for h in paris], [h.nom for h in lyon]]
+
+
+def test_clustering_is_deterministic():
+    hotels = [_hotel(i, 48.85 + 0.003 * (i % 7), 2.35 + 0.002 * (i % 5)) for i in range(30)]
+    first = cluster_hotels(hotels, 4)
+    second = cluster_hotels(hotels, 4)
+
+    assert first[0] == second[0]
+    assert (first[1] == second[1]).all()
+    assert first[2] == second[2]
+
+
+def test_more_hotels_clusters_than_workers():
+    centroids = cluster_hotels([_hotel(0, 45.7640, 4.8357), _hotel(1, 48.8566, 2.3522),
+                                _hotel(2, 43.2965, 5.3698)], 3)[1]
+    workers = [_worker('Em_and_Pop', 48.86, 2.35), _worker('Jo_and_Al', 43.30, 5.37)]
+    cluster_per_worker = assign_clusters(workers, centroids)
+
+    assert {i: tuple(centroids[c].round(2)) for i, c in cluster_per_worker.items()} == {
+        0: (48.86, 2.35), 1: (43.30, 5.37)}
+
+
+def test_full_clusters_are_routed():
+    hotels = [_hotel(i, 48.85 + 0.001 * i, 2.35) for i in range(2 * HOTELS_PER_ROUTE + 3)]
+    workers = [_worker('Em_and_Pop', 48.85, 2.35), _worker('Jo_and_Al', 48.87, 2.35)]
+
+    clusters, _, _ = cluster_hotels(hotels, len(workers))
+    assert [len(cluster) for cluster in clusters] == [HOTELS_PER_ROUTE] * len(workers)
+
+    itinerary, unassigned = solve_routes_by_cluster(hotels, workers, processes=1)
+    assert len(unassigned) == 3
+    assert [len(route) - 2 for route in itinerary] == [HOTELS_PER_ROUTE] * len(workers)
+    assert sorted(label for route in itinerary for label in route[1:-1]) == sorted(
+        format_label(h) for cluster in clusters for h in cluster)
@@ -0,0 +1,33 @@
+import numpy as np
+
+from src.configuration_selection import routes_lower_bound
+from src.domain.distances import distances_block
+from src.domain.entities import Hotel, Point, Worker
+from src.domain.solver import HOTELS_PER_ROUTE
+
+
+def _point(latitude, longitude):
+    return Point(latitude=latitude, longitude=longitude)
+
+
+def _round_trip(worker, hotel):
+    there, back = [np.array([[p.latitude, p.longitude]]) for p in [worker.point, hotel.point]]
+    return int(distances_block(there, back)[0, 0]) + int(distances_block(back, there)[0, 0])
+
+
+def test_lower_bound_is_the_round_trip_to_the_nearest_hotel():
+    # Far apart in longitude, where the distances differ the most from one way to the other
+    worker = Worker(name='Em_and_Pop', point=_point(48.85, 2.35))
+    near, far = Hotel(nom='Near', point=_point(48.90, 4.35)), Hotel(nom='Far', point=_point(43.30, 5.37))
+
+    assert routes_lower_bound([near, far], [worker]) == _round_trip(worker, near)
+
+
+def test_lower_bound_counts_the_couples_needed_to_visit_all_the_hotels():
+    workers = [Worker(name='worker_{}'.format(i), point=_point(48.85 + 0.01 * i, 2.35)) for i in range(3)]
+    hotel = Hotel(nom='Hotel', point=_point(48.80, 2.35))
+
+    one_route = routes_lower_bound([hotel] * HOTELS_PER_ROUTE, workers)
+    two_routes = routes_lower_bound([hotel] * (HOTELS_PER_ROUTE + 1), workers)
+    assert one_route == _round_trip(workers[0], hotel)
+    assert two_routes == one_route + _round_trip(workers[1], hotel)
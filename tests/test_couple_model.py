@@ -1,4 +1,8 @@
-from src.domain.model_couple import exploration, satisfaction
+import time
+
+from src.domain.entities import Employee
+from src.domain.model_couple import (exploration, satisfaction, solve_couples_anytime, equivalence_classes,
+                                     canonical_form, update_couples)
 from src.domain.utils import SolverStatus
 
 
@@ -67,4 +71,72 @@ def test_simple_couples_specific_sector():
         for couple in config.keys():
             assert set(couple) in expected_couples
 
-    assert len(satisfaction_assignments) == 1
\ No newline at end of file
+    assert len(satisfaction_assignments) == 1
+
+
+def test_anytime_couples_report_status_and_gap():
+    employees = [Employee(name='Em', availabilities=[1, 4, 12], sector=1),
+                 Employee(name='Pop', availabilities=[1, 12, 16], sector=1),
+                 Employee(name='E', availabilities=[4, 12, 16], sector=1),
+                 Employee(name='Palpal', availabilities=[12, 16], sector=1),
+                 Employee(name='Nobody', availabilities=[12], sector=None)]
+
+    result = solve_couples_anytime(employees, time_limit=5)
+
+    assert result['status'] == SolverStatus.OPTIMAL
+    assert result['gap'] == 0
+    assert result['objective'] == result['bound']
+    assert len(result['assignments']) == 2
+    for config in result['assignments']:
+        assert all('Nobody' not in couple for couple in config)
+
+
+def _look_alike_roster(look_alikes_count=8):
+    persons = ['Volunteer{}'.format(i) for i in range(look_alikes_count)] + ['Em', 'Pop']
+    dispos_per_person = {p: [[1, 4], [12, 16]] for p in persons}
+    dispos_per_person['Em'] = [[1, 4], [4, 8]]
+    dispos_per_person['Pop'] = [[12, 16], [16, 20]]
+    sector_per_person = {p: 1 for p in persons}
+    return persons, dispos_per_person, sector_per_person
+
+
+def _enumerate(persons, dispos_per_person, sector_per_person, symmetry_breaking):
+    start = time.time()
+    _, _, maximisation = exploration(persons, dispos_per_person, sector_per_person,
+                                     symmetry_breaking=symmetry_breaking)
+    status, assignments = satisfaction(persons, dispos_per_person, sector_per_person, maximisation,
+                                       symmetry_breaking=symmetry_breaking)
+    return status, assignments, time.time() - start
+
+
+def test_symmetry_breaking_on_look_alike_volunteers():
+    roster = _look_alike_roster()
+
+    _, all_assignments, all_time = _enumerate(*roster, symmetry_breaking=False)
+    status, assignments, time_with_symmetry_breaking = _enumerate(*roster, symmetry_breaking=True)
+
+    print('Without symmetry breaking: {} configurations in {:.2f}s'.format(len(all_assignments), all_time))
+    print('With symmetry breaking: {} configurations in {:.2f}s'.format(len(assignments),
+                                                                          time_with_symmetry_breaking))
+    assert status == SolverStatus.MODEL_SAT
+    class_per_person = equivalence_classes(*roster)
+    # Same configurations, up to a permutation of the look-alike volunteers, and without duplicates
+    assert {canonical_form(a, class_per_person) for a in all_assignments} == \
+        {canonical_form(a, class_per_person) for a in assignments}
+    assert len({canonical_form(a, class_per_person) for a in assignments}) == len(assignments)
+    assert len(assignments) < len(all_assignments)
+
+
+def test_update_couples_after_a_cancellation():
+    employees = [Employee(name='Em', availabilities=[1, 4], sector=1),
+                 Employee(name='Pop', availabilities=[1, 12], sector=1),
+                 Employee(name='E', availabilities=[4, 12], sector=1),
+                 Employee(name='Palpal', availabilities=[12, 16], sector=1),
+                 Employee(name='Alone', availabilities=[4, 20], sector=1)]
+    previous_assignments = {('Em', 'Pop'): ([1], 1), ('E', 'Palpal'): ([12], 1)}
+
+    # Pop cancels: Em is freed and can be paired with the volunteer left alone
+    assignments = update_couples(previous_assignments, [e for e in employees if e.name != 'Pop'])
+
+    assert assignments[('E', 'Palpal')] == ([12], 1)
+    assert {frozenset(couple) for couple in assignments} == {frozenset(('E', 'Palpal')), frozenset(('Em', 'Alone'))}
@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.domain.distances import build_distances_matrix, load_distances_matrix, nearest_neighbours
+from src.domain.entities import Point
+from src.services.map import Map
+
+
+def _points(count):
+    random = np.random.RandomState(0)
+    return [Point(latitude=48.5 + random.rand() * 0.5, longitude=2.0 + random.rand() * 0.5) for _ in range(count)]
+
+
+def test_matrix_matches_map_distance():
+    points = _points(20)
+    matrix = build_distances_matrix(points, block_size=7)
+
+    map = Map()
+    expected = [[int(np.round(map.distance(p1, p2) * 1000)) for p2 in points] for p1 in points]
+    assert matrix.dtype == np.int32
+    assert matrix.tolist() == expected
+
+
+def test_big_matrices_are_memory_mapped_read_only(tmpdir):
+    points = _points(50)
+    in_memory = build_distances_matrix(points)
+
+    mapped = build_distances_matrix(points, mmap_threshold=10)
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+    assert (mapped == in_memory).all()
+
+    path = str(tmpdir.join('distances.npy'))
+    build_distances_matrix(points, path=path)
+    assert (load_distances_matrix(path) == in_memory).all()
+
+
+def test_nearest_neighbours_are_among_the_candidates():
+    matrix = build_distances_matrix(_points(30))
+    neighbours = nearest_neighbours(matrix, 5, first_candidate=4, block_size=7)
+
+    assert neighbours.shape == (30, 5)
+    for node, row in enumerate(neighbours):
+        candidates = [c for c in range(4, 30) if c != node]
+        expected = sorted(candidates, key=lambda c: matrix[node, c])[:5]
+        assert sorted(matrix[node, row]) == sorted(matrix[node, expected])
+
+
+def test_known_distances_are_reused():
+    points = _points(30)
+    known = build_distances_matrix(points[12:])
+    assert (build_distances_matrix(points, block_size=7, known_distances=known) == build_distances_matrix(points)).all()
@@ -0,0 +1,70 @@
+import tracemalloc
+
+import pytest
+
+from src.domain.entities import Employee, Hotel, Point, Worker
+
+RECORDS_COUNT = 10000
+
+
+def _hotel_record(i):
+    return {'address': '{} rue de Paris'.format(i), 'bedroom_number': '12', 'capacity': '30', 'features': '4',
+            'hotel_status': '0', 'nom': 'Hotel {}'.format(i), 'postcode': '75001',
+            'point': {'latitude': 48.85 + i * 1e-6, 'longitude': 2.34}}
+
+
+def _allocated_size(build):
+    tracemalloc.start()
+    records = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def test_slotted_entities_use_less_memory_than_records():
+    dict_size = _allocated_size(lambda: [_hotel_record(i) for i in range(RECORDS_COUNT)])
+    entity_size = _allocated_size(lambda: [Hotel.from_record(_hotel_record(i)) for i in range(RECORDS_COUNT)])
+
+    assert entity_size < 0.7 * dict_size
+
+
+def test_entities_have_no_instance_dict():
+    for entity in [Hotel.from_record(_hotel_record(0)), Point(latitude=48.85, longitude=2.34),
+                   Employee(name='Em'), Worker(name='Em_and_Pop')]:
+        assert not hasattr(entity, '__dict__')
+        with pytest.raises(AttributeError):
+            entity.unknown = 1
+
+
+def test_as_dict_round_trips():
+    record = _hotel_record(2)
+    hotel = Hotel.from_record(record)
+    assert hotel.as_dict() == record
+    assert Hotel.from_record(hotel.as_dict()).as_dict() == record
+
+    employee = Employee(name='Em', surname='Dupont', point=Point(latitude=48.85, longitude=2.34),
+                        availabilities=[201902120], sector=1)
+    copy = Employee.from_record(employee.as_dict())
+    assert isinstance(copy.point, Point)
+    assert copy.as_dict() == employee.as_dict()
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(TypeError):
+        Hotel(nom='Hotel 0', stars=3)
+    with pytest.raises(KeyError):
+        Worker(name='Em_and_Pop')['unknown'] = 1
+
+
+def test_entities_keep_a_dict_interface():
+    hotel = Hotel.from_record(_hotel_record(1))
+    assert isinstance(hotel.point, Point)
+    assert hotel['nom'] == 'Hotel 1'
+    assert hotel.get('unknown') is None
+    assert hotel.as_dict()['point'] == {'latitude': 48.85 + 1e-6, 'longitude': 2.34}
+
+    worker = Worker(name='Em_and_Pop', sector=1)
+    worker['routes'] = ['1 rue de Paris 75001']
+    assert worker.routes == ['1 rue de Paris 75001']
+    assert worker.as_dict()['visits'] is None
@@ -0,0 +1,40 @@
+from datetime import date
+
+from src.domain.entities import Hotel, Worker
+from src.domain.hotel_selection import rank_hotels, select_hotels
+from src.domain.solver import HOTELS_PER_ROUTE, format_label
+
+
+def _hotel(i, postcode='75001', capacity='10', bedroom_number='5', features='1'):
+    return Hotel(nom='Hotel {}'.format(i), address='{} rue de Paris'.format(i), postcode=postcode,
+                 capacity=capacity, bedroom_number=bedroom_number, features=features)
+
+
+def test_hotels_are_ranked_by_priority():
+    small, large, unknown = _hotel(0), _hotel(1, capacity='40', bedroom_number='20'), _hotel(2, capacity='')
+    ranking = rank_hotels([small, large, unknown])
+    assert [h for _, h in ranking] == [large, small, unknown]
+
+
+def test_hotels_visited_long_ago_come_first():
+    recent, old = _hotel(0), _hotel(1)
+    last_visits = {format_label(recent): date(2019, 1, 30), format_label(old): date(2018, 6, 1)}
+    ranking = rank_hotels([recent, old], last_visits, today=date(2019, 2, 1))
+    assert [h for _, h in ranking] == [old, recent]
+
+
+def test_selection_is_bounded_by_the_visits_of_each_sector():
+    paris = [_hotel(i, capacity=str(i)) for i in range(10)]
+    suburbs = [_hotel(i, postcode='93200') for i in range(10, 20)]
+    workers = [Worker(name='Em_and_Pop', sector=1)]
+
+    selected = select_hotels(paris + suburbs, workers, visits_per_worker=3)
+
+    assert selected == [paris[9], paris[8], paris[7]]
+
+
+def test_selection_fits_in_the_routes_of_the_couples():
+    hotels = [_hotel(i) for i in range(20)]
+    workers = [Worker(name='Em_and_Pop', sector=1), Worker(name='Jo_and_Al', sector=1)]
+
+    assert len(select_hotels(hotels, workers)) == 2 * HOTELS_PER_ROUTE
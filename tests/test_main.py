@@ -0,0 +1,15 @@
+import pytest
+
+from src.main import main
+
+
+@pytest.mark.parametrize('modes', [{'per_sector': True, 'portfolio': True}, {'portfolio': True, 'top_k': 3},
+                                   {'per_sector': True, 'by_cluster': True}])
+def test_routing_modes_are_exclusive(modes):
+    with pytest.raises(ValueError, match='routing mode'):
+        main(**modes)
+
+
+def test_hotels_preselection_is_not_compatible_with_top_k():
+    with pytest.raises(ValueError, match='top_k'):
+        main(preselect_hotels=True, top_k=3)
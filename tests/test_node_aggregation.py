@@ -0,0 +1,32 @@
+from src.domain.entities import Hotel, Point
+from src.domain.node_aggregation import aggregate_hotels
+
+
+def _hotel(i, latitude, longitude):
+    return Hotel(nom='Hotel {}'.format(i), address='{} rue de Paris'.format(i), postcode='75001',
+                 point=Point(latitude=latitude, longitude=longitude))
+
+
+def test_colocated_hotels_are_merged():
+    same_building = [_hotel(i, 48.8566, 2.3522) for i in range(3)]
+    next_door = _hotel(3, 48.8568, 2.3522)  # ~20 meters north
+    far = _hotel(4, 48.8666, 2.3522)  # ~1 km north
+    groups = aggregate_hotels(same_building + [next_door, far], radius=50)
+
+    assert [group.hotels for group in groups] == [same_building + [next_door], [far]]
+    assert groups[0].point == same_building[0].point
+    assert groups[0].address == '0 rue de Paris'
+
+
+def test_radius_zero_only_merges_identical_coordinates():
+    hotels = [_hotel(0, 48.8566, 2.3522), _hotel(1, 48.8566, 2.3522), _hotel(2, 48.8567, 2.3522)]
+    assert [len(group.hotels) for group in aggregate_hotels(hotels, radius=0)] == [2, 1]
+
+
+def test_groups_are_bounded_and_hotels_without_point_kept_alone():
+    hotels = [_hotel(i, 48.8566, 2.3522) for i in range(5)]
+    unknown = Hotel(nom='Unknown', address='rue inconnue', postcode='75001')
+    groups = aggregate_hotels(hotels + [unknown], max_hotels=2)
+
+    assert [len(group.hotels) for group in groups] == [2, 2, 1, 1]
+    assert groups[-1].hotels == [unknown] and groups[-1].point is None
@@ -0,0 +1,67 @@
+import gzip
+
+import pytest
+
+from src.domain.entities import Worker
+from src.services.plan_cache import PlanCache, paginate
+
+flask = pytest.importorskip('flask')
+
+
+def _workers(count):
+    return [Worker(name='Em{}_and_Pop{}'.format(i, i), sector=1 + i % 2, routes=['{} rue de Paris 75001'.format(i)],
+                   visits=[{'date': '2019-02-1{}'.format(i % 3), 'time': 'Matin'}]) for i in range(count)]
+
+
+def _planning(count):
+    return [dict(worker.as_dict(), names=worker.name.replace('_', ' ')) for worker in _workers(count)]
+
+
+def test_plans_are_filtered_and_paginated():
+    planning = _planning(120)
+
+    first = paginate(planning, page_size=50)
+    assert (len(first['data']), first['pages_count'], first['sectors']) == (50, 3, [1, 2])
+    assert first['dates'] == ['2019-02-10', '2019-02-11', '2019-02-12']
+
+    filtered = paginate(planning, sector=2, date='2019-02-11', page=9, page_size=50)
+    assert filtered['page'] == 1
+    assert {w['sector'] for w in filtered['data']} == {2}
+    assert {v['date'] for w in filtered['data'] for v in w['visits']} == {'2019-02-11'}
+
+
+def test_pages_are_rendered_once_and_dropped_with_their_plan():
+    cache = PlanCache(plans_limit=1)
+    renders = []
+    plan_id = cache.add(_planning(1))
+
+    for _ in range(2):
+        html, compressed, etag = cache.rendered((plan_id, None, None, 1), lambda: renders.append(1) or '<p>plan</p>')
+    assert len(renders) == 1
+    assert gzip.decompress(compressed) == html == b'<p>plan</p>'
+
+    cache.add(_planning(1))
+    assert cache.get(plan_id) is None and not cache.pages
+
+
+def test_plan_pages_support_conditional_requests(monkeypatch):
+    from src import app
+
+    monkeypatch.setattr(app, 'main', lambda: _workers(120))
+    monkeypatch.setattr(app, 'plan_cache', PlanCache())
+    client = app.api.test_client()
+
+    response = client.post('/', data={'submit_button': 'Do Plan'})
+    assert response.status_code == 302
+    url = response.headers['Location']
+
+    response = client.get(url + '?sector=1', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    html = gzip.decompress(response.data).decode('utf-8')
+    assert 'Em0 and pop0' in html and 'Em1 and pop1' not in html
+    assert 'Page 1 / 2' in html
+
+    response = client.get(url + '?sector=1', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    assert client.get('/plans/unknown').status_code == 404
@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+from src import rolling_horizon
+from src.domain.entities import Employee, Hotel
+from src.domain.availability_model import process_employee_availability
+from src.domain.solver import format_label
+from src.domain.utils import availability_slot
+from src.rolling_horizon import _carry_over_couples, _restrict_to_window, plan_rolling_horizon
+
+
+def _slot(month, day, half_day=0):
+    return availability_slot(date(2019, month, day), half_day)
+
+
+def _employee(name, availabilities, sector=1):
+    return Employee(name=name, address='1 rue {}'.format(name), postcode='75001', availabilities=availabilities,
+                    sector=sector)
+
+
+def _hotels(count):
+    return [Hotel(nom='Hotel {}'.format(i), address='{} rue de Paris'.format(i), postcode='75001')
+            for i in range(count)]
+
+
+def _pair_first_two(calls):
+    def solve_couples(employees):
+        calls.append([e.name for e in employees])
+        e1, e2 = employees[:2]
+        return [{(e1.name, e2.name): ([a for a in e1.availabilities if a in e2.availabilities], 1)}]
+    return solve_couples
+
+
+def _visit_first_hotel(calls):
+    def solve_routes(hotels, workers):
+        calls.append([format_label(h) for h in hotels])
+        return [[format_label(w), format_label(hotels[i]), format_label(w)] for i, w in enumerate(workers)]
+    return solve_routes
+
+
+def test_availabilities_are_restricted_to_the_window():
+    employees = [_employee('A', [_slot(2, 11), _slot(2, 18, 1)]), _employee('B', [_slot(2, 19, 1)])]
+    window = _restrict_to_window(employees, date(2019, 2, 11), date(2019, 2, 18))
+    assert [(e.name, e.availabilities) for e in window] == [('A', [_slot(2, 11)])]
+
+
+def test_windows_follow_the_declared_dates():
+    declared = [process_employee_availability({'availability': day, 'time_of_day': 'Matin'})[0]
+                for day in ['12/01/2019', '25/01/2019', '05/02/2019']]
+    employees = [_employee('A', declared)]
+
+    windows = [_restrict_to_window(employees, date(2019, 1, 7) + timedelta(days=7 * i),
+                                   date(2019, 1, 14) + timedelta(days=7 * i)) for i in range(5)]
+    assert [[a for e in window for a in e.availabilities] for window in windows] == [
+        [declared[0]], [], [declared[1]], [], [declared[2]]]
+
+
+def test_couples_are_carried_over_and_visited_hotels_skipped(monkeypatch):
+    couples_calls, routes_calls = [], []
+    monkeypatch.setattr(rolling_horizon, 'solve_couples', _pair_first_two(couples_calls))
+    monkeypatch.setattr(rolling_horizon, 'solve_routes', _visit_first_hotel(routes_calls))
+    employees = [_employee('A', [_slot(2, 11), _slot(2, 18)]), _employee('B', [_slot(2, 11), _slot(2, 18)])]
+    hotels = _hotels(3)
+
+    plans = plan_rolling_horizon(hotels, employees, window_days=7, start=date(2019, 2, 11))
+
+    assert [[w.name for w in plan['workers']] for plan in plans] == [['A_and_B'], ['A_and_B']]
+    # The couple formed in the first window is kept, without solving again
+    assert couples_calls == [['A', 'B']]
+    assert routes_calls[1] == [format_label(h) for h in hotels[1:]]
+    assert plans[1]['workers'][0].routes == [format_label(hotels[1])]
+
+
+def test_an_employee_is_carried_over_in_a_single_couple():
+    employees = [_employee(name, [_slot(2, 25)]) for name in 'ABC']
+    assignment = _carry_over_couples(employees, [('A', 'B'), ('C', 'A')])
+    assert list(assignment) == [('A', 'B')]
+
+
+def test_employees_are_not_booked_in_two_couples(monkeypatch):
+    monkeypatch.setattr(rolling_horizon, 'solve_couples', _pair_first_two([]))
+    monkeypatch.setattr(rolling_horizon, 'solve_routes', _visit_first_hotel([]))
+    employees = [_employee('A', [_slot(2, 11), _slot(2, 18), _slot(2, 25)]),
+                 _employee('B', [_slot(2, 11), _slot(2, 25)]),
+                 _employee('C', [_slot(2, 18), _slot(2, 25)])]
+
+    plans = plan_rolling_horizon(_hotels(4), employees, window_days=7, start=date(2019, 2, 11))
+    assert [[w.name for w in plan['workers']] for plan in plans] == [['A_and_B'], ['A_and_C'], ['A_and_B']]
+
+
+def test_employees_without_sector_are_not_paired(monkeypatch):
+    couples_calls = []
+    monkeypatch.setattr(rolling_horizon, 'solve_couples', _pair_first_two(couples_calls))
+    employees = [_employee('A', [_slot(2, 11)], sector=None), _employee('B', [_slot(2, 11)], sector=None)]
+
+    plans = plan_rolling_horizon(_hotels(1), employees, window_days=7)
+    assert couples_calls == []
+    assert plans[0]['workers'] == []
@@ -0,0 +1,109 @@
+import json
+
+from src.domain.availability_model import read_employees_file
+from src.domain.entities import Employee
+from src.services.roster_index import RosterIndex
+
+HEADER = 'name;surname;street_number;street_type;street_name;complement;postcode;license;availability;time_of_day;' \
+         'area1;area2;area3;area4\n'
+
+
+def _row(name, surname, availability, time_of_day):
+    return '{};{};1;rue;de Paris;;75001;oui;{};{};75;;;\n'.format(name, surname, availability, time_of_day)
+
+
+def test_incremental_ingestion_only_parses_appended_rows(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    index_path = str(tmpdir.join('roster-index.json'))
+    source.write(HEADER + _row('Em', 'Dupont', '12/02/2019', 'Matin'))
+
+    roster = RosterIndex(index_path).ingest(str(source))
+    assert len(roster) == 1
+    assert roster[0]['availabilities'] == [201902120]
+
+    # Same employee written differently, and an incomplete line still being written
+    source.write(_row(' em ', 'DUPONT', '13/02/2019', 'Matin') + 'Pop;Martin;1', mode='a')
+    index = RosterIndex(index_path)
+    offset = index.offset
+    roster = index.ingest(str(source))
+    assert len(roster) == 1
+    assert roster[0]['availabilities'] == [201902120, 201902130]
+    assert index.offset > offset
+
+    source.write(';rue;de Lyon;;75012;oui;12/02/2019;Matin;75;;;\n', mode='a')
+    roster = RosterIndex(index_path).ingest(str(source))
+    assert sorted(e['name'] for e in roster) == ['Em', 'Pop']
+
+
+def test_rewritten_file_is_ingested_from_scratch(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    index_path = str(tmpdir.join('roster-index.json'))
+    source.write(HEADER + _row('Em', 'Dupont', '12/02/2019', 'Matin') + _row('Pop', 'Martin', '12/02/2019', 'Matin'))
+    RosterIndex(index_path).ingest(str(source))
+
+    source.write(HEADER + _row('Palpal', 'Durand', '14/02/2019', 'Matin'))
+    roster = RosterIndex(index_path).ingest(str(source))
+    assert [e['name'] for e in roster] == ['Palpal']
+
+
+def test_roster_is_made_of_employee_entities(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    index_path = str(tmpdir.join('roster-index.json'))
+    source.write(HEADER + _row('Em', 'Dupont', '12/02/2019', 'Matin'))
+    RosterIndex(index_path).ingest(str(source))
+
+    [employee] = RosterIndex(index_path).employees.values()
+    assert isinstance(employee, Employee)
+    assert (employee.name, employee.address, employee.availabilities) == ('Em', '1 rue de Paris', [201902120])
+
+
+def test_file_rewritten_after_its_header_is_ingested_from_scratch(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    index_path = str(tmpdir.join('roster-index.json'))
+    rows = [_row('Employee{}'.format(i), 'Dupont', '12/02/2019', 'Matin') for i in range(10)]
+    source.write(HEADER + ''.join(rows))
+    RosterIndex(index_path).ingest(str(source))
+
+    # Same header and size, the last row replaced
+    source.write(HEADER + ''.join(rows[:-1]) + _row('Employee9', 'Durand', '12/02/2019', 'Matin'))
+    roster = RosterIndex(index_path).ingest(str(source))
+    assert len(roster) == 10
+    assert roster[-1]['surname'] == 'Durand'
+
+
+def test_full_and_incremental_loads_group_availabilities_the_same_way(tmpdir):
+    from src.main import load_employees
+
+    source = tmpdir.join('enriched-fichier-salarie.csv')
+    header = 'address;area1;area2;area3;area4;availability;latitude;license;longitude;name;names;postcode;surname;' \
+             'time_of_day\n'
+    row = '1 rue de Paris;75;;;;{};48.85;oui;2.34;{};;75001;{};Matin\n'
+    source.write(header + row.format('12/02/2019', 'Em', 'Dupont') + row.format('12/02/2019', ' em ', 'DUPONT')
+                 + row.format('13/02/2019', 'Em', 'Dupont'))
+
+    full = load_employees(str(source))
+    incremental = load_employees(str(source), incremental=True, roster_index_file=str(tmpdir.join('index.json')))
+    assert [e.as_dict() for e in full] == [e.as_dict() for e in incremental]
+    assert [e.availabilities for e in full] == [[201902120, 201902130]]
+
+
+def test_index_of_a_previous_version_is_rebuilt(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    index_path = tmpdir.join('roster-index.json')
+    source.write(HEADER + _row('Em', 'Dupont', '12/01/2019', 'Apres-midi'))
+    index_path.write(json.dumps({'source': str(source), 'offset': 0, 'fingerprint': '',
+                                 'employees': {'em dupont': {'name': 'Em', 'availabilities': [20191120]}}}))
+
+    roster = RosterIndex(str(index_path)).ingest(str(source))
+    assert roster[0]['availabilities'] == [201901121]
+
+
+def test_raw_file_reading_groups_availabilities_as_the_ingestion(tmpdir):
+    source = tmpdir.join('fichier-salarie.csv')
+    source.write(HEADER + _row('Em', 'Dupont', '12/01/2019', 'Jour') + _row(' em ', 'DUPONT', '12/01/2019', 'Matin')
+                 + _row('Pop', 'Martin', '13/01/2019', 'Apres-midi'))
+
+    employees = list(read_employees_file(str(source)))
+    roster = RosterIndex(str(tmpdir.join('roster-index.json'))).ingest(str(source))
+    assert [e['availabilities'] for e in employees] == [e.availabilities for e in roster] == [
+        [201901120, 201901121], [201901131]]
@@ -0,0 +1,16 @@
+from src.domain.sectors import sector_from_departement, sector_from_postcode
+
+
+def test_sector_from_departement():
+    assert sector_from_departement('75') == 1
+    assert sector_from_departement(93) == 4
+    assert sector_from_departement('') is None
+    assert sector_from_departement('60') is None
+
+
+def test_sector_from_postcode():
+    assert sector_from_postcode('75012') == 1
+    assert sector_from_postcode(' 92100 ') == 3
+    assert sector_from_postcode(77000) == 2
+    assert sector_from_postcode('2A004') is None
+    assert sector_from_postcode(None) is None
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from src.services.solver_worker import SolverWorker
+
+
+def _echo(requests, responses):
+    for parameters in iter(requests.get, None):
+        responses.put(('success', parameters, [{'search': 'echo'}]))
+
+
+def _die(requests, responses):
+    requests.get()
+    os._exit(1)
+
+
+def _hang(requests, responses):
+    for _ in iter(requests.get, None):
+        pass
+
+
+def test_plan_returns_the_result_and_the_telemetry_of_the_worker():
+    worker = SolverWorker(target=_echo).start()
+    try:
+        assert worker.plan(sector=1) == {'sector': 1}
+    finally:
+        worker.stop()
+
+
+def test_dead_worker_is_reported_and_restarted():
+    worker = SolverWorker(target=_die).start()
+    process = worker.process
+    with pytest.raises(RuntimeError, match='died'):
+        worker.plan()
+    assert worker.process is not process
+    assert worker.process.is_alive()
+    worker.process.terminate()
+
+
+def test_plan_is_abandoned_after_the_timeout():
+    worker = SolverWorker(timeout=1, target=_hang).start()
+    process = worker.process
+    with pytest.raises(RuntimeError, match='No plan after 1s'):
+        worker.plan()
+    assert not process.is_alive()
+    assert worker.process.is_alive()
+    worker.stop()
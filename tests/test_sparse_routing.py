@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+
+from src.domain.entities import Hotel, Point, Worker
+from src.domain.solver import create_data_model, create_search_parameters, hotels_successors, solve_data_model
+
+HOTELS_COUNT = 300
+WORKERS_COUNT = 50
+SPARSE_COST_TOLERANCE = 0.1  # The sparse routes may be at most 10% longer than the dense ones
+
+
+def _instance():
+    random = np.random.RandomState(0)
+    hotels = [Hotel(address='{} rue de Paris'.format(i), postcode='75001',
+                    point=Point(latitude=48.82 + random.rand() * 0.08, longitude=2.27 + random.rand() * 0.14))
+              for i in range(HOTELS_COUNT)]
+    workers = [Worker(name='worker_{}'.format(i), address='{} rue du Depot'.format(i), postcode='75004',
+                      point=Point(latitude=48.853, longitude=2.350))
+               for i in range(WORKERS_COUNT)]
+    return hotels, workers
+
+
+def _route_nodes(data, route):
+    # All the depots are at the same place, any of their nodes gives the distances
+    node_per_label = {label: node for node, label in enumerate(data['labels'])}
+    return [node_per_label[label] for label in route]
+
+
+def _benchmark(**parameters):
+    hotels, workers = _instance()
+    data = create_data_model(hotels, workers, False, **parameters)
+    start = time.time()
+    itinerary, cost = solve_data_model(data, create_search_parameters())
+    return time.time() - start, itinerary, cost
+
+
+def test_sparse_routing_benchmark():
+    dense_time, _, dense_cost = _benchmark()
+    sparse_time, itinerary, sparse_cost = _benchmark(neighbours=10)
+
+    print('dense: {:.2f}s, {}m - sparse: {:.2f}s, {}m'.format(dense_time, dense_cost, sparse_time, sparse_cost))
+    assert sum(len(route) - 2 for route in itinerary) == HOTELS_COUNT
+    assert sparse_cost <= (1 + SPARSE_COST_TOLERANCE) * dense_cost
+
+
+def test_hotels_are_only_linked_to_their_nearest_neighbours():
+    hotels, workers = _instance()
+    data = create_data_model(hotels, workers, False, neighbours=10)
+    successors = hotels_successors(data)
+
+    first_hotel = 2 * WORKERS_COUNT
+    assert sorted(successors) == list(range(first_hotel, data['num_locations']))
+    for node, hotel_successors in successors.items():
+        assert set(data['neighbours'][node]) <= hotel_successors
+        assert all(n >= first_hotel and n != node for n in hotel_successors)
+        # The arcs are allowed both ways
+        assert all(node in successors[n] for n in hotel_successors)
+    assert max(len(s) for s in successors.values()) < HOTELS_COUNT / 5
+
+
+def test_sparse_routing_visits_every_hotel_on_allowed_arcs():
+    hotels, workers = _instance()
+    data = create_data_model(hotels, workers, False, neighbours=10, max_distance=30000)
+    itinerary, cost = solve_data_model(data, create_search_parameters())
+    successors = hotels_successors(data)
+
+    assert sum(len(route) - 2 for route in itinerary) == HOTELS_COUNT
+    for route in itinerary:
+        nodes = _route_nodes(data, route)
+        hotels_nodes = nodes[1:-1]
+        assert all(j in successors[i] for i, j in zip(hotels_nodes, hotels_nodes[1:]))
+        assert sum(data['distances'][i, j] for i, j in zip(nodes, nodes[1:])) <= 30000
+
+
+def test_routes_respect_the_maximum_distance():
+    hotels, workers = _instance()
+    data = create_data_model(hotels, workers, False, neighbours=10, max_distance=8000, drop_penalty=1000000)
+    itinerary, _ = solve_data_model(data, create_search_parameters())
+
+    # Hotels are dropped rather than breaking the limit
+    for route in itinerary:
+        nodes = _route_nodes(data, route)
+        assert sum(data['distances'][i, j] for i, j in zip(nodes, nodes[1:])) <= 8000
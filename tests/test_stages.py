@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from src.services.stages import run_stages
+
+
+def _sleep(seconds, result):
+    def stage(*_):
+        time.sleep(seconds)
+        return result
+    return stage
+
+
+def test_independent_stages_overlap():
+    results, report = run_stages({
+        'hotels': (_sleep(0.2, 'hotels'), []),
+        'employees': (_sleep(0.1, 'employees'), []),
+        'couples': (_sleep(0.2, 'couples'), ['employees']),
+        'routes': (lambda hotels, couples: hotels + '+' + couples, ['hotels', 'couples']),
+    })
+
+    assert results['routes'] == 'hotels+couples'
+    assert report['critical_path'] == ['employees', 'couples', 'routes']
+    assert report['sequential_time'] >= 0.5
+    assert report['wall_time'] < report['sequential_time'] - 0.1
+    assert abs(report['critical_path_time'] - 0.3) < 0.1
+
+
+def test_stages_wait_for_their_dependencies():
+    started = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def run(*_):
+            with lock:
+                started.append(name)
+        return run
+
+    run_stages({'c': (stage('c'), ['b']), 'b': (stage('b'), ['a']), 'a': (stage('a'), [])})
+    assert started == ['a', 'b', 'c']
+
+
+def test_failures_and_cycles_are_raised():
+    def fail():
+        raise RuntimeError('parsing failed')
+
+    with pytest.raises(RuntimeError):
+        run_stages({'hotels': (fail, []), 'routes': (lambda hotels: hotels, ['hotels'])})
+    with pytest.raises(ValueError):
+        run_stages({'a': (lambda b: b, ['b']), 'b': (lambda a: a, ['a'])})
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+HEAVY_MODULES = ['ortools', 'numpy', 'requests']
+
+
+def _import_times(module):
+    """Parse the `-X importtime` report of a fresh interpreter importing `module`"""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                             cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 0, process.stderr
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _top_level_packages(times):
+    return {name.split('.')[0] for name in times}
+
+
+def test_main_does_not_import_solvers():
+    times = _import_times('src.main')
+    print('src.main imported in {}us'.format(times['src.main']))
+    assert not _top_level_packages(times) & set(HEAVY_MODULES)
+
+
+def test_app_does_not_import_solvers():
+    pytest.importorskip('flask')
+    times = _import_times('src.app')
+    print('src.app imported in {}us'.format(times['src.app']))
+    assert not _top_level_packages(times) & set(HEAVY_MODULES)
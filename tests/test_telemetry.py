@@ -0,0 +1,47 @@
+from src.services import telemetry
+
+
+def setup_function():
+    telemetry.clear()
+
+
+def test_records_track_solutions_status_and_gap():
+    record = telemetry.start('couples_exploration', persons=4, couples=10)
+    telemetry.add_solution(record, 80)
+    telemetry.add_solution(record, 100)
+    telemetry.finish(record, 'FEASIBLE', 100, 110, branches=12, conflicts=3)
+
+    [saved] = telemetry.records()
+    assert saved['model'] == {'persons': 4, 'couples': 10}
+    assert [s['objective'] for s in saved['solutions']] == [80, 100]
+    assert saved['solutions'][0]['time'] <= saved['solutions'][1]['time'] <= saved['wall_time']
+    assert saved['status'] == 'FEASIBLE'
+    assert saved['gap'] == 0.1
+    assert saved['statistics'] == {'branches': 12, 'conflicts': 3}
+
+
+def test_records_can_be_filtered_and_are_bounded():
+    for _ in range(telemetry.RECORDS_LIMIT + 1):
+        telemetry.finish(telemetry.start('routing', locations=3), 'INFEASIBLE')
+    telemetry.finish(telemetry.start('couples_satisfaction'), 'OPTIMAL', 100)
+
+    assert len(telemetry.records()) == telemetry.RECORDS_LIMIT
+    [satisfaction] = telemetry.records('couples_satisfaction')
+    assert satisfaction['gap'] is None
+
+
+def _search(name):
+    telemetry.finish(telemetry.start(name), 'FEASIBLE', 1)
+    return name
+
+
+def test_records_of_pool_processes_are_merged():
+    from multiprocessing import Pool
+
+    telemetry.finish(telemetry.start('parent'), 'FEASIBLE', 1)
+    with Pool(2) as pool:
+        results = telemetry.merged(pool.starmap(telemetry.collected, [(_search, 'first'), (_search, 'second'),
+                                                                      (_search, 'third')]))
+
+    assert results == ['first', 'second', 'third']
+    assert sorted(r['search'] for r in telemetry.records()) == ['first', 'parent', 'second', 'third']
@@ -0,0 +1,33 @@
+import os
+from datetime import date
+
+from src.domain.availability_model import process_employee_availability
+from src.domain.entities import Worker
+from src.services.visit_history import load_last_visits, record_visits
+
+
+def _slots(day, time_of_day='Matin'):
+    return process_employee_availability({'availability': day, 'time_of_day': time_of_day})
+
+
+def test_visits_are_recorded_on_the_first_availability_of_the_couple(tmpdir):
+    path = os.path.join(str(tmpdir), 'last-visits.json')
+    assert load_last_visits(path) == {}
+
+    record_visits(path, [Worker(name='Em_and_Pop',
+                                availabilities=_slots('18/02/2019', 'Apres-midi') + _slots('12/02/2019'),
+                                routes=['1 rue de Paris 75001', '2 rue de Paris 75001']),
+                         Worker(name='Idle', availabilities=_slots('12/02/2019'), routes=[])])
+    record_visits(path, [Worker(name='Em_and_Pop', availabilities=_slots('25/02/2019'),
+                                routes=['1 rue de Paris 75001'])])
+
+    assert load_last_visits(path) == {'1 rue de Paris 75001': date(2019, 2, 25),
+                                      '2 rue de Paris 75001': date(2019, 2, 12)}
+
+
+def test_visits_are_recorded_on_the_earliest_date(tmpdir):
+    path = os.path.join(str(tmpdir), 'last-visits.json')
+    record_visits(path, [Worker(name='Em_and_Pop', availabilities=_slots('05/02/2019') + _slots('12/01/2019', 'Jour'),
+                                routes=['1 rue de Paris 75001'])])
+
+    assert load_last_visits(path) == {'1 rue de Paris 75001': date(2019, 1, 12)}